@@ -5,24 +5,56 @@ Extract mutual friend data from VRCX SQLite database
 import sqlite3
 import os
 import json
+import gzip
+from pathlib import Path
+
+# msgpack is optional; when installed the friend cache is stored as MessagePack, which packs
+# and unpacks much faster than JSON
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# orjson is optional; it encodes the JSON form of the friend cache much faster than json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Friend/mutual cache written after each fetch; older versions wrote it uncompressed
+FRIEND_CACHE_FILE = 'vrcx_mutual_friends.json.gz'
+MSGPACK_FRIEND_CACHE_FILE = 'vrcx_mutual_friends.msgpack'
+LEGACY_FRIEND_CACHE_FILE = 'vrcx_mutual_friends.json'
 
 def get_vrcx_db_path():
     """Get path to VRCX database"""
     appdata = os.getenv('APPDATA')
     return os.path.join(appdata, 'VRCX', 'VRCX.sqlite3')
 
+def connect_readonly(db_path):
+    """Open a SQLite database read-only, with pages read through mmap
+
+    VRCX may be running and writing to its database, so immutable=1 (which skips
+    change detection entirely) is not used.
+    """
+    conn = sqlite3.connect(Path(os.path.abspath(db_path)).as_uri() + '?mode=ro', uri=True)
+    conn.execute("PRAGMA mmap_size = 268435456")
+    return conn
+
 def explore_vrcx_database():
     """Explore VRCX database structure"""
     db_path = get_vrcx_db_path()
     
-    if not os.path.exists(db_path):
+    try:
+        size_bytes = os.stat(db_path).st_size
+    except FileNotFoundError:
         print(f"VRCX database not found at: {db_path}")
         return None
     
     print(f"Opening VRCX database: {db_path}")
-    print(f"Size: {os.path.getsize(db_path) / 1024 / 1024:.2f} MB\n")
+    print(f"Size: {size_bytes / (1024 * 1024):.2f} MB\n")
     
-    conn = sqlite3.connect(db_path)
+    conn = connect_readonly(db_path)
     cursor = conn.cursor()
     
     # Get all tables
@@ -59,6 +91,14 @@ def explore_vrcx_database():
     conn.close()
     print("\n" + "=" * 60)
 
+def format_user_id(user_hash):
+    """Turn a table-name user hash (usr + 32 hex chars) into a hyphenated VRChat user ID"""
+    user_id = user_hash.replace('usr', 'usr_')
+    # Insert hyphens at proper positions: usr_XXXXXXXX-XXXX-XXXX-XXXX-XXXXXXXXXXXX
+    if len(user_id) == 36:  # usr_ + 32 hex chars
+        return f"{user_id[:12]}-{user_id[12:16]}-{user_id[16:20]}-{user_id[20:24]}-{user_id[24:]}"
+    return user_id
+
 def get_vrcx_users():
     """Get list of all VRCX users with their display names and user IDs"""
     db_path = get_vrcx_db_path()
@@ -66,75 +106,86 @@ def get_vrcx_users():
     if not os.path.exists(db_path):
         return []
     
-    conn = sqlite3.connect(db_path)
+    conn = connect_readonly(db_path)
     cursor = conn.cursor()
+    cursor.execute("PRAGMA cache_size = -20000")
     
     # Find friend_log tables (pattern: usr[hash]_friend_log_current)
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE '%friend_log_current'")
-    friend_tables = cursor.fetchall()
+    table_names = [name for (name,) in cursor.fetchall()]
+    if not table_names:
+        conn.close()
+        return []
+    
+    user_hashes = [name.replace('_friend_log_current', '') for name in table_names]
+    user_ids = [format_user_id(user_hash) for user_hash in user_hashes]
+    
+    # Friend counts for every account in one statement
+    friend_counts = {}
+    try:
+        count_sql = " UNION ALL ".join(f"SELECT '{name}', COUNT(*) FROM {name}" for name in table_names)
+        friend_counts = dict(cursor.execute(count_sql).fetchall())
+    except sqlite3.Error:
+        # Count table by table so one unreadable table doesn't hide the other accounts
+        for table_name, user_hash in zip(table_names, user_hashes):
+            try:
+                friend_counts[table_name] = cursor.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+            except sqlite3.Error as e:
+                print(f"Error processing user {user_hash}: {e}")
+    
+    # Latest display name per account from gamelog_join_leave (most reliable), in one query.
+    # SQLite takes the bare display_name column from the row holding MAX(created_at).
+    display_names = {}
+    try:
+        placeholders = ",".join("?" * len(user_ids))
+        rows = cursor.execute(
+            f"SELECT user_id, display_name, MAX(created_at) FROM gamelog_join_leave "
+            f"WHERE user_id IN ({placeholders}) GROUP BY user_id",
+            user_ids
+        ).fetchall()
+        display_names = {user_id: display_name for user_id, display_name, _ in rows if display_name}
+    except sqlite3.Error:
+        pass
     
     users = []
-    for (table_name,) in friend_tables:
-        # Extract user hash from table name
-        user_hash = table_name.replace('_friend_log_current', '')
+    for table_name, user_hash, formatted_id in zip(table_names, user_hashes, user_ids):
+        if table_name not in friend_counts:
+            continue
+        friend_count = friend_counts[table_name]
+        display_name = display_names.get(formatted_id)
         
-        try:
-            friend_count = cursor.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
-            
-            # Format user ID with hyphens for display
-            user_id = user_hash.replace('usr', 'usr_')
-            # Insert hyphens at proper positions: usr_XXXXXXXX-XXXX-XXXX-XXXX-XXXXXXXXXXXX
-            if len(user_id) == 36:  # usr_ + 32 hex chars
-                formatted_id = f"{user_id[:12]}-{user_id[12:16]}-{user_id[16:20]}-{user_id[20:24]}-{user_id[24:]}"
-            else:
-                formatted_id = user_id
-            
-            # Try to get display name from gamelog_join_leave (most reliable)
-            display_name = None
+        # Fallback: try feed_status table
+        if not display_name:
             try:
-                gamelog_result = cursor.execute(
-                    "SELECT display_name FROM gamelog_join_leave WHERE user_id = ? ORDER BY created_at DESC LIMIT 1",
-                    (formatted_id,)
+                feed_table = f"{user_hash}_feed_status"
+                feed_result = cursor.execute(
+                    f"SELECT display_name FROM {feed_table} ORDER BY created_at DESC LIMIT 1"
                 ).fetchone()
-                if gamelog_result:
-                    display_name = gamelog_result[0]
+                if feed_result:
+                    display_name = feed_result[0]
             except:
                 pass
-            
-            # Fallback: try feed_status table
-            if not display_name:
-                try:
-                    feed_table = f"{user_hash}_feed_status"
-                    feed_result = cursor.execute(
-                        f"SELECT display_name FROM {feed_table} ORDER BY created_at DESC LIMIT 1"
-                    ).fetchone()
-                    if feed_result:
-                        display_name = feed_result[0]
-                except:
-                    pass
-            
-            # Create display string with name if found
-            if display_name:
-                display = f"{display_name} - {formatted_id} ({friend_count} friends)"
-            else:
-                display = f"{formatted_id} ({friend_count} friends)"
-            
-            users.append({
-                'user_hash': user_hash,
-                'user_id': formatted_id,
-                'display_name': display_name or 'Unknown',
-                'table_name': table_name,
-                'friend_count': friend_count,
-                'display': display
-            })
-        except Exception as e:
-            print(f"Error processing user {user_hash}: {e}")
+        
+        # Create display string with name if found
+        if display_name:
+            display = f"{display_name} - {formatted_id} ({friend_count} friends)"
+        else:
+            display = f"{formatted_id} ({friend_count} friends)"
+        
+        users.append({
+            'user_hash': user_hash,
+            'user_id': formatted_id,
+            'display_name': display_name or 'Unknown',
+            'table_name': table_name,
+            'friend_count': friend_count,
+            'display': display
+        })
     
     conn.close()
     return users
 
-def extract_friends_and_mutuals(user_hash=None):
-    """Extract friends list from VRCX (returns friend IDs and names only, no mutuals)
+def iter_friends(user_hash=None):
+    """Yield (user_id, display_name) for each friend of a VRCX account, streamed row by row
     
     Args:
         user_hash: Specific user hash to extract (e.g., 'usr49f62904b3194265aa3279a39714616b')
@@ -144,59 +195,137 @@ def extract_friends_and_mutuals(user_hash=None):
     
     if not os.path.exists(db_path):
         print(f"VRCX database not found")
-        return {}
-    
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+        return
     
-    # Find friend_log tables (pattern: usr[hash]_friend_log_current)
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE '%friend_log_current'")
-    friend_tables = cursor.fetchall()
-    
-    if not friend_tables:
-        print("No friend_log tables found")
+    conn = connect_readonly(db_path)
+    try:
+        cursor = conn.cursor()
+        
+        # Find friend_log tables (pattern: usr[hash]_friend_log_current)
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE '%friend_log_current'")
+        friend_tables = cursor.fetchall()
+        
+        if not friend_tables:
+            print("No friend_log tables found")
+            return
+        
+        print(f"Found {len(friend_tables)} friend_log tables")
+        
+        # Select the appropriate table
+        if user_hash:
+            table_name = f"{user_hash}_friend_log_current"
+            if (table_name,) not in friend_tables:
+                print(f"Table for user {user_hash} not found")
+                return
+            print(f"Using table for selected user: {table_name}")
+        else:
+            # Use the first user's friend table
+            table_name = friend_tables[0][0]
+            print(f"Using table: {table_name}")
+        
+        # Rows without an ID or name are skipped in SQL (NULL != '' is not true either)
+        cursor.execute(f"SELECT user_id, display_name FROM {table_name} WHERE user_id != '' AND display_name != ''")
+        for user_id, display_name in cursor:
+            yield user_id, display_name
+    finally:
         conn.close()
-        return {}
-    
-    print(f"Found {len(friend_tables)} friend_log tables")
-    
-    # Select the appropriate table
-    if user_hash:
-        table_name = f"{user_hash}_friend_log_current"
-        if (table_name,) not in friend_tables:
-            print(f"Table for user {user_hash} not found")
-            conn.close()
-            return {}
-        print(f"Using table for selected user: {table_name}")
-    else:
-        # Use the first user's friend table
-        table_name = friend_tables[0][0]
-        print(f"Using table: {table_name}")
+
+def extract_friends_and_mutuals(user_hash=None):
+    """Extract friends list from VRCX (returns friend IDs and names only, no mutuals)
     
+    Args:
+        user_hash: Specific user hash to extract (e.g., 'usr49f62904b3194265aa3279a39714616b')
+                   If None, uses the first user found
+    """
     # Extract friends (names only, mutuals will come from API)
     friends_dict = {}
     
     try:
-        # Get all friends from the table
-        cursor.execute(f"SELECT user_id, display_name FROM {table_name}")
-        rows = cursor.fetchall()
-        
-        print(f"Found {len(rows)} friends in VRCX database")
+        for user_id, display_name in iter_friends(user_hash):
+            friends_dict[user_id] = {
+                'name': display_name,
+                'mutuals': []  # Will be populated by API fetch
+            }
         
-        for user_id, display_name in rows:
-            if user_id and display_name:
-                friends_dict[user_id] = {
-                    'name': display_name,
-                    'mutuals': []  # Will be populated by API fetch
-                }
+        if friends_dict:
+            print(f"Found {len(friends_dict)} friends in VRCX database")
     except Exception as e:
         print(f"Error extracting friends: {e}")
         import traceback
         traceback.print_exc()
     
-    conn.close()
     return friends_dict
 
+def find_friend_cache(base_dir):
+    """Return the path of the newest readable friend cache in base_dir, or None"""
+    filenames = [FRIEND_CACHE_FILE, LEGACY_FRIEND_CACHE_FILE]
+    if msgpack is not None:
+        filenames.insert(0, MSGPACK_FRIEND_CACHE_FILE)
+    
+    newest, newest_mtime = None, None
+    for filename in filenames:
+        path = os.path.join(base_dir, filename)
+        try:
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            continue
+        if newest_mtime is None or mtime > newest_mtime:
+            newest, newest_mtime = path, mtime
+    return newest
+
+def load_friend_cache(path):
+    """Load a friend cache written by save_friend_cache (or a legacy uncompressed one)"""
+    if path.endswith('.msgpack'):
+        with open(path, 'rb') as f:
+            return msgpack.unpackb(f.read(), raw=False)
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+def iter_cache_friends(friends):
+    """Yield (user_id, name) from a friend cache's friends: {id: name} or the older {id: {'id', 'name'}}"""
+    for user_id, info in friends.items():
+        if isinstance(info, dict):
+            yield user_id, info.get('name', user_id)
+        else:
+            yield user_id, info
+
+def iter_cache_edges(edges):
+    """Yield (user1, user2, count) from a friend cache's edges: [[a, b], ...] or the older {"a|b": count}"""
+    if isinstance(edges, dict):
+        for edge_key, count in edges.items():
+            parts = edge_key.split('|')
+            if len(parts) == 2:
+                yield parts[0], parts[1], count
+    else:
+        for user1, user2 in edges:
+            yield user1, user2, 1
+
+def save_friend_cache(base_dir, data, pretty=False):
+    """Write the friend cache into base_dir and return its path
+    
+    The cache is MessagePack when msgpack is installed, otherwise gzip-compressed JSON.
+    pretty=True always writes indented JSON, for debugging.
+    """
+    if msgpack is not None and not pretty:
+        path = os.path.join(base_dir, MSGPACK_FRIEND_CACHE_FILE)
+        with open(path, 'wb') as f:
+            f.write(msgpack.packb(data, use_bin_type=True))
+        return path
+    
+    # Encode in one call and hand gzip a single buffer rather than streaming many small writes
+    if orjson is not None:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+    elif pretty:
+        payload = json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+    else:
+        payload = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    # The file is mostly repeated user ID strings, so it compresses several times over
+    path = os.path.join(base_dir, FRIEND_CACHE_FILE)
+    with gzip.open(path, 'wb', compresslevel=6) as f:
+        f.write(payload)
+    return path
+
 if __name__ == '__main__':
     print("VRCX Database Explorer\n")
     explore_vrcx_database()
@@ -8,7 +8,59 @@ import base64
 import time
 import pickle
 import os
+import sqlite3
+import queue
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Set, Tuple
+from extract_vrcx_mutuals import connect_readonly, save_friend_cache
+
+# Mutual friend lists change slowly, so cached results are reused for a day
+MUTUALS_CACHE_TTL = 86400
+
+# Mutuals requests from all workers share one budget (60 per minute), so adding workers
+# overlaps latency without raising the request rate
+API_REQUESTS_PER_SECOND = 1
+
+# Backoff after a 429 without Retry-After: doubles per retry of the same friend, capped
+RATE_LIMIT_BASE_BACKOFF = 5
+RATE_LIMIT_MAX_BACKOFF = 60
+
+# Waiting workers sleep in slices this long so a Stop request is noticed promptly
+STOP_POLL_INTERVAL = 0.25
+
+class _RateLimiter:
+    """Token bucket shared by the fetch workers: `rate` requests per second, bursts up to `burst`"""
+    
+    def __init__(self, rate: float, burst: int, stop_callback=None):
+        self.rate = rate
+        self.burst = burst
+        self.stop_callback = stop_callback
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> bool:
+        """Block until a request may be sent; returns False instead if a stop was requested"""
+        while True:
+            if self.stop_callback and self.stop_callback():
+                return False
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(min(wait, STOP_POLL_INTERVAL))
+    
+    def pause(self, seconds: float):
+        """Hold every worker back for `seconds`; overlapping pauses don't stack"""
+        with self._lock:
+            self._tokens = min(self._tokens, -seconds * self.rate)
+            self._updated = time.monotonic()
 
 class VRChatMutualFetcher:
     def __init__(self, base_dir=None, stop_callback=None):
@@ -20,10 +72,17 @@ class VRChatMutualFetcher:
         # Use base_dir if provided, otherwise current directory
         self.base_dir = base_dir
         self.stop_callback = stop_callback
+        # Logged-in VRChat user id, set by load_session/login; mutuals are cached per account
+        self.user_id = None
+        # Worker sessions are lent out per friend and kept warm between fetch runs, so
+        # their keep-alive connections (and TLS handshakes) are reused instead of redone
+        self._idle_sessions = queue.LifoQueue()
         if base_dir:
             self.session_file = os.path.join(base_dir, 'vrchat_session.pkl')
+            self.cache_file = os.path.join(base_dir, 'mutuals_cache.sqlite')
         else:
             self.session_file = 'vrchat_session.pkl'
+            self.cache_file = 'mutuals_cache.sqlite'
     
     def save_session(self):
         """Save session cookies to file"""
@@ -31,6 +90,29 @@ class VRChatMutualFetcher:
             pickle.dump(self.session.cookies, f)
         print("Session saved for future use\n")
     
+    def _acquire_session(self):
+        """Borrow a worker session carrying the current login cookies (most recently used first)"""
+        try:
+            session = self._idle_sessions.get_nowait()
+        except queue.Empty:
+            session = requests.Session()
+            session.headers.update(self.session.headers)
+        session.cookies.update(self.session.cookies)
+        return session
+    
+    def _release_session(self, session):
+        """Return a worker session for reuse by the next friend or fetch run"""
+        self._idle_sessions.put(session)
+    
+    def close(self):
+        """Close the login session and all idle worker sessions"""
+        while True:
+            try:
+                self._idle_sessions.get_nowait().close()
+            except queue.Empty:
+                break
+        self.session.close()
+    
     def load_session(self):
         """Load session cookies from file"""
         if os.path.exists(self.session_file):
@@ -42,6 +124,7 @@ class VRChatMutualFetcher:
                 response = self.session.get(f"{self.base_url}/auth/user")
                 if response.status_code == 200:
                     data = response.json()
+                    self.user_id = data.get('id')
                     print(f"Restored session for {data.get('displayName', 'User')}\n")
                     return True
                 else:
@@ -99,9 +182,10 @@ class VRChatMutualFetcher:
             if 'Authorization' in self.session.headers:
                 del self.session.headers['Authorization']
             
+            self.user_id = data.get('id')
             print(f"Login successful as {data.get('displayName', 'User')}")
             self.save_session()
-            return data.get('id')
+            return self.user_id
         else:
             raise Exception(f"Login failed: {response.status_code} - {response.text}")
     
@@ -153,7 +237,7 @@ class VRChatMutualFetcher:
                 db_path = os.path.join(appdata, 'VRCX', 'VRCX.sqlite3')
                 
                 if os.path.exists(db_path):
-                    conn = sqlite3.connect(db_path)
+                    conn = connect_readonly(db_path)
                     cursor = conn.cursor()
                     
                     # Find friend table (first account only)
@@ -167,7 +251,7 @@ class VRChatMutualFetcher:
                         table_name = friend_tables[0][0]
                         cursor.execute(f"SELECT user_id, display_name FROM {table_name}")
                         
-                        for user_id, display_name in cursor.fetchall():
+                        for user_id, display_name in cursor:
                             if user_id not in friends:
                                 friends[user_id] = {
                                     'id': user_id,
@@ -184,154 +268,236 @@ class VRChatMutualFetcher:
         print(f"Total friends: {len(friends)}\n")
         return friends
     
-    def fetch_all_mutuals(self, friend_ids: list, progress_callback=None) -> Dict[str, list]:
+    def _open_cache(self):
+        """Open the mutuals cache database, creating the table on first use"""
+        conn = sqlite3.connect(self.cache_file)
+        # Mutuals depend on who is logged in; a table from before rows were keyed by account
+        # can't tell accounts apart, so it is dropped and refilled
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(mutuals)")]
+        if columns and 'account_id' not in columns:
+            conn.execute("DROP TABLE mutuals")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS mutuals "
+            "(account_id TEXT, friend_id TEXT, mutuals_json BLOB, fetched_at INTEGER, "
+            "PRIMARY KEY (account_id, friend_id))"
+        )
+        return conn
+    
+    def _load_cached_mutuals(self, friend_ids: list, ttl: int) -> Dict[str, list]:
+        """Return cached mutual IDs for the given friends that are younger than ttl seconds"""
+        cached = {}
+        if ttl <= 0 or not os.path.exists(self.cache_file):
+            return cached
+        
+        wanted = set(friend_ids)
+        cutoff = int(time.time()) - ttl
+        try:
+            conn = self._open_cache()
+            try:
+                rows = conn.execute(
+                    "SELECT friend_id, mutuals_json FROM mutuals WHERE account_id = ? AND fetched_at >= ?",
+                    (self.user_id or '', cutoff)
+                )
+                for friend_id, mutuals_json in rows:
+                    if friend_id in wanted:
+                        cached[friend_id] = json.loads(mutuals_json)
+            finally:
+                conn.close()
+        except (sqlite3.Error, ValueError) as e:
+            print(f"  Warning: Could not read mutuals cache: {e}")
+        return cached
+    
+    def _store_cached_mutuals(self, fetched: Dict[str, list]):
+        """Save freshly fetched mutual IDs to the cache"""
+        if not fetched:
+            return
+        
+        now = int(time.time())
+        account_id = self.user_id or ''
+        try:
+            conn = self._open_cache()
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO mutuals (account_id, friend_id, mutuals_json, fetched_at) "
+                        "VALUES (?, ?, ?, ?)",
+                        [(account_id, friend_id, json.dumps(mutuals), now) for friend_id, mutuals in fetched.items()]
+                    )
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"  Warning: Could not write mutuals cache: {e}")
+    
+    def _fetch_friend_mutuals(self, friend_id: str, limiter: _RateLimiter):
+        """
+        Fetch one friend's mutual friend IDs (runs on a worker thread).
+        
+        Every page request first takes a token from the shared limiter.
+        Returns (mutual_ids, complete), or None if a stop was requested before starting.
+        Incomplete results (request errors) are used for this run but not cached.
+        """
+        if self.stop_callback and self.stop_callback():
+            return None
+        
+        session = self._acquire_session()
+        try:
+            # Fetch mutuals for this friend using paginated endpoint
+            all_mutuals = []
+            offset = 0
+            n = 100
+            retries = 0
+            
+            while True:
+                if not limiter.acquire():
+                    return all_mutuals, False
+                response = session.get(
+                    f"{self.base_url}/users/{friend_id}/mutuals/friends",
+                    params={'n': n, 'offset': offset}
+                )
+                
+                if response.status_code == 200:
+                    batch = response.json()
+                    if not batch or len(batch) == 0:
+                        break
+                    
+                    # Extract just the user IDs
+                    mutual_ids = [m.get('id') for m in batch if m.get('id')]
+                    all_mutuals.extend(mutual_ids)
+                    
+                    # If we got fewer than n, we're done
+                    if len(batch) < n:
+                        break
+                    
+                    offset += n
+                    
+                elif response.status_code == 429:
+                    if self.stop_callback and self.stop_callback():
+                        return all_mutuals, False
+                    # Honour Retry-After when given, otherwise back off exponentially; either is capped
+                    # and jitter keeps the workers from retrying in lockstep. The pause applies to all
+                    # workers and is waited out in limiter.acquire(), which still notices Stop
+                    retries += 1
+                    retry_after = response.headers.get('Retry-After', '')
+                    if retry_after.isdigit():
+                        delay = min(RATE_LIMIT_MAX_BACKOFF, float(retry_after))
+                    else:
+                        delay = min(RATE_LIMIT_MAX_BACKOFF, RATE_LIMIT_BASE_BACKOFF * 2 ** (retries - 1))
+                    delay *= random.uniform(0.8, 1.2)
+                    print(f"    Rate limited on {friend_id}, backing off {delay:.0f}s...")
+                    limiter.pause(delay)
+                    continue
+                else:
+                    # Other error, skip this friend
+                    return all_mutuals, False
+            
+            return all_mutuals, True
+            
+        except Exception as e:
+            print(f" Error fetching mutuals for friend {friend_id}: {e}")
+            return [], False
+        finally:
+            self._release_session(session)
+    
+    def fetch_all_mutuals(self, friend_ids: list, progress_callback=None, max_workers: int = 4,
+                          force_refresh: bool = False, cache_ttl: int = MUTUALS_CACHE_TTL,
+                          requests_per_second: float = API_REQUESTS_PER_SECOND) -> Dict[str, list]:
         """
         Fetch mutual friends for a list of friend IDs.
         
         Args:
             friend_ids: List of VRChat user IDs
-            progress_callback: Optional callback function(current, total, friend_name)
+            progress_callback: Optional callback function(current, total)
+            max_workers: Number of friends fetched concurrently
+            force_refresh: Ignore cached results and fetch every friend again
+            cache_ttl: Age in seconds after which cached results are fetched again
+            requests_per_second: Request rate shared by all workers
             
         Returns:
             Dictionary mapping friend_id to list of mutual friend IDs
         """
-        print(f"Fetching mutual connections for {len(friend_ids)} friends...")
-        print("   (This may take several minutes due to API rate limiting)")
-        
-        mutuals_data = {}
         total = len(friend_ids)
+        results = {} if force_refresh else self._load_cached_mutuals(friend_ids, cache_ttl)
+        done = len(results)
+        to_fetch = [friend_id for friend_id in friend_ids if friend_id not in results]
         
-        for i, friend_id in enumerate(friend_ids, 1):
-            # Check if stop was requested
-            if self.stop_callback and self.stop_callback():
-                print(f"\nStopped by user at {i}/{total} friends")
-                break
-            
-            # Call progress callback if provided
+        if results:
+            print(f"Using cached mutuals for {done} friends")
             if progress_callback:
-                progress_callback(i, total)
-            
-            if i % 10 == 0 or i == 1:
-                print(f"  Progress: {i}/{total} friends processed...")
+                progress_callback(done, total)
+        print(f"Fetching mutual connections for {len(to_fetch)} friends...")
+        if to_fetch:
+            print("   (This may take several minutes due to API rate limiting)")
+        
+        fresh = {}
+        workers = max(1, max_workers)
+        limiter = _RateLimiter(requests_per_second, burst=workers, stop_callback=self.stop_callback)
+        
+        # Requests overlap across a small worker pool, paced by the shared limiter; results are
+        # collected on this thread, so the progress count needs no locking
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self._fetch_friend_mutuals, friend_id, limiter): friend_id for friend_id in to_fetch}
             
-            try:
-                # Fetch mutuals for this friend using paginated endpoint
-                all_mutuals = []
-                offset = 0
-                n = 100
-                
-                while True:
-                    response = self.session.get(
-                        f"{self.base_url}/users/{friend_id}/mutuals/friends",
-                        params={'n': n, 'offset': offset}
-                    )
-                    
-                    if response.status_code == 200:
-                        batch = response.json()
-                        if not batch or len(batch) == 0:
-                            break
-                        
-                        # Extract just the user IDs
-                        mutual_ids = [m.get('id') for m in batch if m.get('id')]
-                        all_mutuals.extend(mutual_ids)
-                        
-                        # If we got fewer than n, we're done
-                        if len(batch) < n:
-                            break
-                        
-                        offset += n
-                        time.sleep(0.2)  # Brief delay between pages
-                        
-                    elif response.status_code == 429:
-                        print(f"    Rate limited at friend {i}/{total}, waiting 30s...")
-                        time.sleep(30)
-                        continue
-                    else:
-                        # Other error, skip this friend
-                        break
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                outcome = future.result()
+                if outcome is None:
+                    continue
+                mutuals, complete = outcome
+                friend_id = futures[future]
+                results[friend_id] = mutuals
+                if complete:
+                    fresh[friend_id] = mutuals
+                done += 1
                 
-                mutuals_data[friend_id] = all_mutuals
+                # Call progress callback if provided
+                if progress_callback:
+                    progress_callback(done, total)
                 
-                # Rate limiting between friends
-                time.sleep(0.5)
+                if done % 10 == 0 or done == 1:
+                    print(f"  Progress: {done}/{total} friends processed...")
                 
-            except Exception as e:
-                print(f" Error fetching mutuals for friend {i}: {e}")
-                mutuals_data[friend_id] = []
-                continue
+                # Check if stop was requested; queued friends are dropped, in-flight ones finish
+                if self.stop_callback and self.stop_callback():
+                    for pending in futures:
+                        pending.cancel()
+            
+        if self.stop_callback and self.stop_callback():
+            print(f"\nStopped by user at {done}/{total} friends")
+        
+        # Whatever was fetched is kept, even if the run was stopped part-way
+        self._store_cached_mutuals(fresh)
+        
+        # Keep the caller's friend order
+        mutuals_data = {friend_id: results[friend_id] for friend_id in friend_ids if friend_id in results}
         
         print(f"Completed fetching mutuals for {len(mutuals_data)} friends\n")
         return mutuals_data
     
-    def get_mutual_friends(self, friends: Dict):
+    def get_mutual_friends(self, friends: Dict, max_workers: int = 4, force_refresh: bool = False):
         """
         Fetch mutual friends using VRChat's /users/{userId}/mutuals/friends endpoint
-        This is the same endpoint VRCX uses
+        This is the same endpoint VRCX uses; requests go through the same worker pool as fetch_all_mutuals
         """
         print("Fetching mutual friends (this will take a while)...")
         print(f"Processing {len(friends)} friends...\n")
         
+        mutuals_data = self.fetch_all_mutuals(list(friends.keys()), max_workers=max_workers, force_refresh=force_refresh)
+        
         edges = {}
         mutual_counts = {}  # Track mutual count per friend
         my_friend_ids = set(friends.keys())
         
-        for i, (friend_id, friend_data) in enumerate(friends.items()):
-            if (i + 1) % 10 == 0 or i == 0:
-                print(f"  Progress: {i+1}/{len(friends)} - {friend_data['name']}")
-            
-            try:
-                # Fetch ALL mutual friends with pagination
-                all_mutuals = []
-                offset = 0
-                n = 100
-                
-                while True:
-                    response = self.session.get(
-                        f"{self.base_url}/users/{friend_id}/mutuals/friends",
-                        params={'n': n, 'offset': offset}
-                    )
-                    
-                    if response.status_code == 200:
-                        batch = response.json()
-                        if not batch or len(batch) == 0:
-                            break
-                        
-                        all_mutuals.extend(batch)
-                        
-                        # If we got fewer than n, we're done
-                        if len(batch) < n:
-                            break
-                        
-                        offset += n
-                        time.sleep(0.3)
-                    else:
-                        break
-                
-                if all_mutuals:
-                    mutual_count = len(all_mutuals)
-                    mutual_counts[friend_id] = mutual_count
-                    
-                    # Create edges for each mutual friend
-                    for mutual_friend in all_mutuals:
-                        mutual_id = mutual_friend.get('id')
-                        if mutual_id and mutual_id in my_friend_ids and mutual_id != friend_id:
-                            edge = tuple(sorted([friend_id, mutual_id]))
-                            edges[edge] = edges.get(edge, 0) + 1
-                    
-                    if mutual_count > 0:
-                        print(f"-> {mutual_count} mutuals")
-                
-                elif response.status_code == 429:
-                    print(f"Rate limited, waiting 30s...")
-                    time.sleep(30)
-                    continue
-                
-                # Rate limiting
-                time.sleep(0.5)
-                
-            except Exception as e:
-                print(f" Error: {e}")
+        for friend_id, mutual_ids in mutuals_data.items():
+            if not mutual_ids:
                 continue
+            mutual_counts[friend_id] = len(mutual_ids)
+            
+            # Create edges for each mutual friend
+            for mutual_id in mutual_ids:
+                if mutual_id in my_friend_ids and mutual_id != friend_id:
+                    edge = tuple(sorted([friend_id, mutual_id]))
+                    edges[edge] = edges.get(edge, 0) + 1
         
         print(f"\nFound {len(edges)} mutual friend connections")
         return edges, mutual_counts
@@ -367,15 +533,13 @@ def main():
         
         # Save results
         output = {
-            'friends': {uid: {'id': uid, 'name': data['name']} for uid, data in friends.items()},
-            'edges': {f"{u1}|{u2}": 1 for (u1, u2) in edges.keys()},
+            'friends': {uid: data['name'] for uid, data in friends.items()},
+            'edges': list(edges),
             'mutual_counts': mutual_counts
         }
         
         # Save to base_dir if specified, otherwise current directory
-        output_file = os.path.join(self.base_dir, 'vrcx_mutual_friends.json') if self.base_dir else 'vrcx_mutual_friends.json'
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(output, f, indent=2, ensure_ascii=False)
+        output_file = save_friend_cache(fetcher.base_dir or '', output)
         
         print(f"\nSaved to: {output_file}")
         
@@ -17,24 +17,69 @@ import math
 import random
 import colorsys
 import re
+import pickle
+import hashlib
 from pathlib import Path
 from typing import Dict, List, Set, Tuple
 import webbrowser
 
+from extract_vrcx_mutuals import connect_readonly, find_friend_cache, load_friend_cache, iter_cache_friends, iter_cache_edges, FRIEND_CACHE_FILE
+
 try:
     import networkx as nx
+    import numpy as np
     import plotly.graph_objects as go
     from plotly.subplots import make_subplots
     import requests
 except ImportError:
     print("Installing required packages...")
     import subprocess
-    subprocess.check_call(['pip', 'install', 'networkx', 'plotly', 'requests'])
+    subprocess.check_call(['pip', 'install', 'networkx', 'numpy', 'plotly', 'requests'])
     import networkx as nx
+    import numpy as np
     import plotly.graph_objects as go
     from plotly.subplots import make_subplots
     import requests
 
+# orjson is optional; it encodes the arrays embedded in the page much faster than json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Without python-louvain, communities come from networkx label propagation instead
+try:
+    import community as community_louvain
+except ImportError:
+    community_louvain = None
+
+# Fixed seed for the layout jitter and background blob samples, so the same network
+# produces the same picture on every generation
+LAYOUT_SEED = 0
+
+# Upper bound on background blob samples per community, keeps large groups cheap to build and render
+BLOB_SAMPLE_BUDGET = 20000
+
+# Write buffer for the multi-MB page, so it reaches the OS in a handful of large writes
+HTML_WRITE_BUFFER = 1 << 20
+
+# Louvain settings, and the file (in cache_dir) holding the last partition keyed by the edge set
+LOUVAIN_RESOLUTION = 1.5
+LOUVAIN_CACHE_FILE = 'louvain_partition.pkl'
+
+
+def _script_json(value) -> str:
+    """Encode a list or NumPy array as JSON for the page script ('</' escaped so it can't close the tag)"""
+    if orjson is not None:
+        # orjson writes non-ASCII as-is; line/paragraph separators are still escaped for older JS engines
+        text = orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+        text = text.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+    else:
+        if isinstance(value, np.ndarray):
+            value = value.tolist()
+        text = json.dumps(value)
+    return text.replace('</', '<\\/')
+
 
 class VRCXDataParser:
     """Parse friend and mutual friend data from VRCX SQLite database"""
@@ -51,7 +96,7 @@ class VRCXDataParser:
     
     def get_friends(self) -> Dict[str, dict]:
         """Extract friends data from VRCX database"""
-        conn = sqlite3.connect(self.db_path)
+        conn = connect_readonly(self.db_path)
         cursor = conn.cursor()
         
         friends = {}
@@ -328,22 +373,26 @@ class VRChatAPIParser:
 class FriendNetworkVisualizer:
     """Create interactive network visualization of friends"""
     
-    def __init__(self, friends: Dict[str, dict], edges: Dict[Tuple[str, str], int] = None):
+    def __init__(self, friends: Dict[str, dict], edges: Dict[Tuple[str, str], int] = None, cache_dir: str = None):
         self.friends = friends
         self.edges = edges or {}
+        self.cache_dir = cache_dir  # Where the Louvain partition is cached between runs (None: no cache)
         self.graph = nx.Graph()
+        self.communities = []  # Communities of connected friends, set by create_visualization
         self._build_graph()
     
     def _build_graph(self):
         """Build NetworkX graph from friends and edges"""
-        # Add nodes
-        for user_id, data in self.friends.items():
-            self.graph.add_node(user_id, **data)
-        
-        # Add edges
-        for (user1, user2), weight in self.edges.items():
-            if user1 in self.graph and user2 in self.graph:
-                self.graph.add_edge(user1, user2, weight=weight)
+        graph = self.graph
+        # Add nodes ((node, attribute dict) pairs in one call)
+        graph.add_nodes_from(self.friends.items())
+        
+        # Add edges in one call; edges to people outside the friend list are skipped
+        graph.add_weighted_edges_from(
+            (user1, user2, weight)
+            for (user1, user2), weight in self.edges.items()
+            if user1 in graph and user2 in graph
+        )
         
         print(f"\nNetwork stats:")
         print(f"  Nodes (friends): {self.graph.number_of_nodes()}")
@@ -358,6 +407,18 @@ class FriendNetworkVisualizer:
                 print(f"  Connected components: {len(components)}")
                 print(f"  Largest component size: {len(max(components, key=len))}")
     
+    def _csr_adjacency(self, nodes: List[str]) -> Tuple[Dict[str, int], 'np.ndarray', 'np.ndarray']:
+        """Build a CSR adjacency (indptr, indices) over nodes, indexed by position in nodes"""
+        index_of = {node: i for i, node in enumerate(nodes)}
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        neighbor_idx = []
+        for i, node in enumerate(nodes):
+            row = sorted(index_of[n] for n in self.graph.neighbors(node))
+            neighbor_idx.extend(row)
+            indptr[i + 1] = indptr[i] + len(row)
+        indices = np.array(neighbor_idx, dtype=np.int32)
+        return index_of, indptr, indices
+    
     def calculate_metrics(self):
         """Calculate network analysis metrics"""
         if self.graph.number_of_edges() == 0:
@@ -387,11 +448,37 @@ class FriendNetworkVisualizer:
             'num_communities': len(communities)
         }
     
+    def _louvain_partition(self, connected_nodes):
+        """Louvain partition of the connected subgraph, reused from cache_dir while the edge set is unchanged"""
+        cache_path = os.path.join(self.cache_dir, LOUVAIN_CACHE_FILE) if self.cache_dir else None
+        if cache_path:
+            edge_list = sorted((u, v) if u < v else (v, u) for u, v in self.graph.edges())
+            edge_key = hashlib.blake2b(repr((LOUVAIN_RESOLUTION, edge_list)).encode('utf-8'), digest_size=16).hexdigest()
+            try:
+                with open(cache_path, 'rb') as f:
+                    cached_key, partition = pickle.load(f)
+                if cached_key == edge_key:
+                    print("  Reusing cached Louvain partition (network unchanged)")
+                    return partition
+            except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+                pass
+        
+        partition = community_louvain.best_partition(self.graph.subgraph(connected_nodes), resolution=LOUVAIN_RESOLUTION,
+                                                      random_state=LAYOUT_SEED)
+        
+        if cache_path:
+            try:
+                with open(cache_path, 'wb') as f:
+                    pickle.dump((edge_key, partition), f, protocol=pickle.HIGHEST_PROTOCOL)
+            except OSError as e:
+                print(f"  Warning: Could not save Louvain partition: {e}")
+        return partition
+    
     def create_visualization(self, output_file: str = 'vrchat_friend_network.html', dark_mode: bool = False, show_heatmap: bool = True, show_edges: bool = True):
         """Create interactive Plotly visualization
         
         Args:
-            output_file: Path to save the HTML file
+            output_file: Path to save the HTML file, or a binary file object to write it to
             dark_mode: Use dark theme for visualization
             show_heatmap: Show background heatmap for communities
             show_edges: Show connection lines by default (can be toggled in HTML)
@@ -407,6 +494,9 @@ class FriendNetworkVisualizer:
         # Use ALL nodes - no exclusions
         all_nodes = list(self.graph.nodes())
         
+        # Neighbour lists are read many times below, so build them once
+        node_neighbors = {n: list(self.graph.neighbors(n)) for n in all_nodes}
+        
         isolated_nodes = [node for node in all_nodes if self.graph.degree(node) == 0]
         connected_nodes = [node for node in all_nodes if self.graph.degree(node) > 0]
         
@@ -417,9 +507,8 @@ class FriendNetworkVisualizer:
         
         # Use Louvain method for better community detection with higher resolution
         print("Detecting communities with Louvain method...")
-        try:
-            import community as community_louvain
-            partition = community_louvain.best_partition(self.graph.subgraph(connected_nodes), resolution=1.5)
+        if community_louvain is not None:
+            partition = self._louvain_partition(connected_nodes)
             
             communities_dict = {}
             for node, comm_id in partition.items():
@@ -428,10 +517,11 @@ class FriendNetworkVisualizer:
                 communities_dict[comm_id].add(node)
             communities = [communities_dict[i] for i in sorted(communities_dict.keys())]
             print(f"  Louvain detected {len(communities)} communities")
-        except ImportError:
+        else:
             print("  Louvain not available, using label propagation...")
             communities = list(nx.community.label_propagation_communities(self.graph.subgraph(connected_nodes)))
             print(f"  Label propagation detected {len(communities)} communities")
+        self.communities = communities
         
         community_map = {}
         for comm_idx, community in enumerate(communities):
@@ -445,7 +535,7 @@ class FriendNetworkVisualizer:
         print("\nAnalyzing node connectivity patterns...")
         
         for node in connected_nodes:
-            neighbors = list(self.graph.neighbors(node))
+            neighbors = node_neighbors[node]
             total_connections = len(neighbors)
             
             if total_connections == 0:
@@ -468,6 +558,13 @@ class FriendNetworkVisualizer:
             intra_ratio = connections_in_primary / max(community_size - 1, 1)
             node_intra_connectivity[node] = intra_ratio
         
+        # CSR adjacency plus per-node community ids (-1 = no community) for vectorized neighbour counts
+        node_index, indptr, indices = self._csr_adjacency(all_nodes)
+        n_comm = max(node_primary_community.values()) + 1 if node_primary_community else 0
+        comm_of = np.full(len(all_nodes), -1, dtype=np.int32)
+        for node, comm in node_primary_community.items():
+            comm_of[node_index[node]] = comm
+        
         # Calculate layout
         pos = {}
         
@@ -516,7 +613,7 @@ class FriendNetworkVisualizer:
         print("  Positioning connected nodes near each other along radius circles...")
         
         # Start with random angles distributed around full circle
-        import random
+        rng = random.Random(LAYOUT_SEED)
         
         # Use detected communities to assign angular regions
         community_list = sorted(set(node_primary_community.values()))
@@ -573,7 +670,7 @@ class FriendNetworkVisualizer:
         for node in layout_nodes:
             if node in node_primary_community:
                 node_comm = node_primary_community[node]
-                neighbors = list(self.graph.neighbors(node))
+                neighbors = node_neighbors[node]
                 if neighbors:
                     same_comm_neighbors = [n for n in neighbors if node_primary_community.get(n) == node_comm]
                     temp_node_cohesion[node] = len(same_comm_neighbors) / len(neighbors)
@@ -605,13 +702,13 @@ class FriendNetworkVisualizer:
                 if cohesion < 0.5:
                     # Push to edge: cohesion 0 -> ±0.5, cohesion 0.5 -> ±0.1
                     edge_factor = (0.5 - cohesion) * 2.0  # 0 to 1
-                    edge_direction = random.choice([-1, 1])  # Random edge
+                    edge_direction = rng.choice([-1, 1])  # Random edge
                     angular_offset = edge_direction * edge_factor * 0.5 * use_span
                 else:
                     # High cohesion stays near center
                     # cohesion 0.5 -> ±0.1, cohesion 1.0 -> ±0.02
                     center_factor = (cohesion - 0.5) * 2.0  # 0 to 1
-                    angular_offset = random.uniform(-0.1, 0.1) * (1.0 - center_factor) * use_span
+                    angular_offset = rng.uniform(-0.1, 0.1) * (1.0 - center_factor) * use_span
                 
                 node_angles[node] = center_angle + angular_offset
             else:
@@ -621,7 +718,7 @@ class FriendNetworkVisualizer:
                     idx = isolated_list.index(node)
                     node_angles[node] = (idx / max(len(isolated_list), 1)) * 2 * math.pi
                 else:
-                    node_angles[node] = random.uniform(0, 2 * math.pi)
+                    node_angles[node] = rng.uniform(0, 2 * math.pi)
         
         # Store community angle boundaries for later constraint enforcement
         community_base_angles = {}
@@ -676,7 +773,7 @@ class FriendNetworkVisualizer:
             angle = node_angles[node]
             
             # Add radial jitter (±45%) to break up perfect circles
-            radial_jitter = random.uniform(-0.45, 0.45) * radius
+            radial_jitter = rng.uniform(-0.45, 0.45) * radius
             adjusted_radius = max(0, radius + radial_jitter)
             
             x = adjusted_radius * math.cos(angle)
@@ -697,7 +794,7 @@ class FriendNetworkVisualizer:
         for node in remaining_nodes:
             cohesion = node_cohesion.get(node, 0)  # Use pre-calculated cohesion
             node_comm = node_primary_community.get(node)
-            neighbors = [n for n in self.graph.neighbors(node) if n in pos]
+            neighbors = [n for n in node_neighbors[node] if n in pos]
             
             if neighbors and node_comm is not None:
                 # Use pre-calculated cohesion to determine positioning strategy
@@ -744,7 +841,7 @@ class FriendNetworkVisualizer:
                     if centroid_x == 0 and centroid_y == 0:
                         angle = node_angles[node]
                         # Add very strong angular jitter to avoid straight lines
-                        angle_jitter = random.uniform(-0.25, 0.25)  # ±14 degrees
+                        angle_jitter = rng.uniform(-0.25, 0.25)  # ±14 degrees
                         angle = angle + angle_jitter
                         centroid_x = 100 * math.cos(angle)  # Arbitrary radius for centroid calculation
                         centroid_y = 100 * math.sin(angle)
@@ -756,7 +853,7 @@ class FriendNetworkVisualizer:
                 
                 # Calculate intra-community connection strength for tighter clustering
                 intra_connections = len(same_comm_neighbors)
-                max_intra = max([len([n for n in self.graph.neighbors(cn) if node_primary_community.get(n) == node_comm]) 
+                max_intra = max([len([n for n in node_neighbors[cn] if node_primary_community.get(n) == node_comm]) 
                                 for cn in connected_nodes if node_primary_community.get(cn) == node_comm], default=1)
                 intra_strength = intra_connections / max_intra if max_intra > 0 else 0
                 
@@ -772,7 +869,7 @@ class FriendNetworkVisualizer:
                     # Reduce jitter for high-connectivity members to maintain clustering
                     # High intra_strength = less jitter (±10%), low = more jitter (±30%)
                     jitter_amount = 0.10 + (1.0 - intra_strength) * 0.20
-                    radial_jitter = random.uniform(-jitter_amount, jitter_amount) * target_radius
+                    radial_jitter = rng.uniform(-jitter_amount, jitter_amount) * target_radius
                     adjusted_radius = max(0, target_radius + radial_jitter)
                     
                     scale = adjusted_radius / current_radius
@@ -781,7 +878,7 @@ class FriendNetworkVisualizer:
                     
                     # Add stronger angular jitter for better spread
                     current_angle = math.atan2(y, x)
-                    angle_jitter = random.uniform(-0.35, 0.35)  # ±0.35 radians (~±20 degrees)
+                    angle_jitter = rng.uniform(-0.35, 0.35)  # ±0.35 radians (~±20 degrees)
                     jittered_angle = current_angle + angle_jitter
                     jittered_radius = math.sqrt(x*x + y*y)
                     x = jittered_radius * math.cos(jittered_angle)
@@ -815,14 +912,14 @@ class FriendNetworkVisualizer:
                     
                     # Recalculate position with constrained angle and jittered radius
                     # Add radial jitter even after angle constraint
-                    final_radius = target_radius + random.uniform(-target_radius * 0.20, target_radius * 0.20)
+                    final_radius = target_radius + rng.uniform(-target_radius * 0.20, target_radius * 0.20)
                     final_radius = max(0, final_radius)
                     x = final_radius * math.cos(angle)
                     y = final_radius * math.sin(angle)
                 else:
                     # Current radius is 0, use polar with heavy jitter
-                    angle = node_angles[node] + random.uniform(-0.3, 0.3)
-                    jittered_radius = target_radius + random.uniform(-target_radius * 0.30, target_radius * 0.30)
+                    angle = node_angles[node] + rng.uniform(-0.3, 0.3)
+                    jittered_radius = target_radius + rng.uniform(-target_radius * 0.30, target_radius * 0.30)
                     jittered_radius = max(0, jittered_radius)
                     x = jittered_radius * math.cos(angle)
                     y = jittered_radius * math.sin(angle)
@@ -833,8 +930,8 @@ class FriendNetworkVisualizer:
                 radius = node_radius[node]
                 angle = node_angles[node]
                 # Add very strong jitter to avoid radial lines
-                angle_jitter = random.uniform(-0.3, 0.3)  # ±17 degrees
-                radial_jitter = random.uniform(-0.35, 0.35) * radius
+                angle_jitter = rng.uniform(-0.3, 0.3)  # ±17 degrees
+                radial_jitter = rng.uniform(-0.35, 0.35) * radius
                 jittered_angle = angle + angle_jitter
                 jittered_radius = max(0, radius + radial_jitter)
                 x = jittered_radius * math.cos(jittered_angle)
@@ -847,7 +944,7 @@ class FriendNetworkVisualizer:
             new_pos = {}
             for node in connected_nodes:
                 node_comm = node_primary_community.get(node)
-                neighbors = [n for n in self.graph.neighbors(node) if n in pos]
+                neighbors = [n for n in node_neighbors[node] if n in pos]
                 if not neighbors:
                     new_pos[node] = pos[node]
                     continue
@@ -930,15 +1027,15 @@ class FriendNetworkVisualizer:
                         # Soft boundary - add random offset instead of hard clamp
                         if min_angle < max_angle:
                             if angle < min_angle:
-                                angle = min_angle + random.uniform(0.02, 0.15)
+                                angle = min_angle + rng.uniform(0.02, 0.15)
                             elif angle > max_angle:
-                                angle = max_angle - random.uniform(0.02, 0.15)
+                                angle = max_angle - rng.uniform(0.02, 0.15)
                         else:
                             if angle > max_angle and angle < min_angle:
                                 if abs(angle - max_angle) < abs(angle - min_angle):
-                                    angle = max_angle - random.uniform(0.02, 0.15)
+                                    angle = max_angle - rng.uniform(0.02, 0.15)
                                 else:
-                                    angle = min_angle + random.uniform(0.02, 0.15)
+                                    angle = min_angle + rng.uniform(0.02, 0.15)
                         
                         # Recalculate with constrained angle but flexible radius
                         angle_radius = math.sqrt(new_x**2 + new_y**2)
@@ -961,7 +1058,7 @@ class FriendNetworkVisualizer:
                 node_comm = node_primary_community.get(node)
                 
                 # Calculate node's cross-community ratio
-                neighbors = list(self.graph.neighbors(node))
+                neighbors = node_neighbors[node]
                 same_comm_neighbors = [n for n in neighbors if node_primary_community.get(n) == node_comm]
                 node_cross_ratio = 1.0 - (len(same_comm_neighbors) / len(neighbors)) if neighbors else 0
                 
@@ -1079,15 +1176,15 @@ class FriendNetworkVisualizer:
                         # Soft boundary with random variance
                         if min_angle < max_angle:
                             if angle < min_angle:
-                                angle = min_angle + random.uniform(0.02, 0.15)
+                                angle = min_angle + rng.uniform(0.02, 0.15)
                             elif angle > max_angle:
-                                angle = max_angle - random.uniform(0.02, 0.15)
+                                angle = max_angle - rng.uniform(0.02, 0.15)
                         else:
                             if angle > max_angle and angle < min_angle:
                                 if abs(angle - max_angle) < abs(angle - min_angle):
-                                    angle = max_angle - random.uniform(0.02, 0.15)
+                                    angle = max_angle - rng.uniform(0.02, 0.15)
                                 else:
-                                    angle = min_angle + random.uniform(0.02, 0.15)
+                                    angle = min_angle + rng.uniform(0.02, 0.15)
                         
                         # Recalculate with constrained angle but flexible radius
                         angle_radius = math.sqrt(new_x**2 + new_y**2)
@@ -1115,7 +1212,8 @@ class FriendNetworkVisualizer:
             edge_y.extend([y0, y1, None])
             edge_list.append([edge[0], edge[1]])
         
-        edge_trace = go.Scatter(
+        # Edges, highlight and nodes use WebGL (scattergl) so large graphs draw without per-point SVG elements
+        edge_trace = go.Scattergl(
             x=edge_x, y=edge_y,
             line=dict(width=0.5, color='#888'),
             hoverinfo='none',
@@ -1124,10 +1222,22 @@ class FriendNetworkVisualizer:
             opacity=0.15
         )
         
+        # Hidden placeholder for the click-highlighted edges, filled in and shown by the page script
+        highlight_trace = go.Scattergl(
+            x=[], y=[],
+            visible=False,
+            mode='lines',
+            line=dict(color='rgba(220,80,80,0.8)', width=2),
+            hoverinfo='none',
+            showlegend=False,
+            name='Highlighted Edges'
+        )
+        
         # Create nodes trace
         node_x = []
         node_y = []
         node_text = []
+        node_names = []  # Plain display names, shipped to the page for search
         node_size = []
         node_color = []
         
@@ -1168,6 +1278,7 @@ class FriendNetworkVisualizer:
             
             data = self.graph.nodes[node]
             name = data.get('name', node)
+            node_names.append(str(name))
             degree = self.graph.degree(node)
             
             # Node size based on total degree (number of connections)
@@ -1201,8 +1312,8 @@ class FriendNetworkVisualizer:
                 comm = node_primary_community[node]
                 
                 # Calculate community cohesion (% of connections within same community)
-                same_comm_neighbors = [n for n in self.graph.neighbors(node) if node_primary_community.get(n) == comm]
-                cross_comm_neighbors = [n for n in self.graph.neighbors(node) if node_primary_community.get(n) != comm]
+                same_comm_neighbors = [n for n in node_neighbors[node] if node_primary_community.get(n) == comm]
+                cross_comm_neighbors = [n for n in node_neighbors[node] if node_primary_community.get(n) != comm]
                 cohesion_pct = (len(same_comm_neighbors) / degree * 100) if degree > 0 else 0
                 
                 # Explain community assignment
@@ -1216,15 +1327,15 @@ class FriendNetworkVisualizer:
                 else:
                     hover_text += f"Bridge member: Only {cohesion_pct:.0f}% in-group<br>"
                     # Find which other communities they connect to most
-                    other_comms = {}
-                    for neighbor in cross_comm_neighbors:
-                        other_comm = node_primary_community.get(neighbor)
-                        if other_comm is not None:
-                            other_comms[other_comm] = other_comms.get(other_comm, 0) + 1
-                    if other_comms:
-                        top_other = sorted(other_comms.items(), key=lambda x: x[1], reverse=True)[0]
-                        other_color = community_colors_rgb[top_other[0] % len(community_colors_rgb)]
-                        hover_text += f"  {top_other[1]} connections to <span style='color:{other_color};font-weight:bold;text-shadow: -1px -1px 0 #000, 1px -1px 0 #000, -1px 1px 0 #000, 1px 1px 0 #000;'>group {top_other[0]}</span><br>"
+                    i = node_index[node]
+                    nbr_comms = comm_of[indices[indptr[i]:indptr[i + 1]]]
+                    nbr_comms = nbr_comms[(nbr_comms != comm) & (nbr_comms >= 0)]
+                    counts = np.bincount(nbr_comms, minlength=n_comm)
+                    top_other = int(counts.argmax()) if n_comm else 0
+                    top_count = int(counts[top_other]) if n_comm else 0
+                    if top_count > 0:
+                        other_color = community_colors_rgb[top_other % len(community_colors_rgb)]
+                        hover_text += f"  {top_count} connections to <span style='color:{other_color};font-weight:bold;text-shadow: -1px -1px 0 #000, 1px -1px 0 #000, -1px 1px 0 #000, 1px 1px 0 #000;'>group {top_other}</span><br>"
                 
                 # Calculate community centrality (how centered node is among its group)
                 # Use spatial distance from community center in the visualization
@@ -1261,7 +1372,7 @@ class FriendNetworkVisualizer:
             
             node_text.append(hover_text)
         
-        node_trace = go.Scatter(
+        node_trace = go.Scattergl(
             x=node_x, y=node_y,
             mode='markers',
             hoverinfo='text',
@@ -1281,25 +1392,24 @@ class FriendNetworkVisualizer:
         # Generate community background blobs AFTER all positioning is finalized
         print("  Creating cohesion-based background highlights...")
         community_blob_traces = []
+        blob_rng = np.random.default_rng(LAYOUT_SEED)
         for comm in set(node_primary_community.values()):
             comm_nodes = [n for n in all_nodes if node_primary_community.get(n) == comm]
             if not comm_nodes:
                 continue
             
             # Create density map points based on cohesion using FINAL positions
-            blob_x = []
-            blob_y = []
-            blob_intensity = []
+            blob_samples = []
+            blob_weights = []
             
-            # Create a proper density field by sampling the entire group area
-            # For each community member, add density contribution across a wide area
+            # Collect contributing members first so the sample budget can be shared out
+            blob_members = []
             for node in comm_nodes:
                 if node not in pos:
                     continue
-                x, y = pos[node]
                 
                 # Calculate node importance (more internal connections = more important)
-                neighbors = list(self.graph.neighbors(node))
+                neighbors = node_neighbors[node]
                 same_comm_neighbors = [n for n in neighbors if node_primary_community.get(n) == comm]
                 intra_connections = len(same_comm_neighbors)
                 
@@ -1317,22 +1427,42 @@ class FriendNetworkVisualizer:
                 # Higher cohesion = more samples and tighter spread = stronger concentrated glow
                 # Scale samples: 50% cohesion = 100 samples, 100% cohesion = 500 samples
                 num_samples = int(100 + cohesion_percent * 400)
+                blob_members.append((node, intra_connections, cohesion_percent, num_samples))
+            
+            # Over budget: share BLOB_SAMPLE_BUDGET out in proportion to each member's weight
+            total_samples = sum(m[3] for m in blob_members)
+            if total_samples > BLOB_SAMPLE_BUDGET:
+                weights = np.array([intra * cohesion for _, intra, cohesion, _ in blob_members])
+                budgets = (BLOB_SAMPLE_BUDGET * weights / weights.sum()).astype(int)
+                blob_members = [(m[0], m[1], m[2], int(b)) for m, b in zip(blob_members, budgets)]
+            
+            # Create a proper density field by sampling the entire group area
+            # For each community member, add density contribution across a wide area
+            for node, intra_connections, cohesion_percent, num_samples in blob_members:
+                if num_samples == 0:
+                    continue
+                x, y = pos[node]
                 
                 # Higher cohesion = tighter spread = more concentrated bright spot
                 # 50% cohesion = 100px spread, 100% cohesion = 40px spread
                 spread = 100 - (cohesion_percent * 60)
                 
-                for _ in range(num_samples):
-                    # Gaussian distribution creates natural falloff
-                    offset_x = random.gauss(0, spread)
-                    offset_y = random.gauss(0, spread)
-                    blob_x.append(x + offset_x)
-                    blob_y.append(y + offset_y)
-                    # Weight by both connectivity and cohesion - creates intense hotspots
-                    blob_intensity.append(intra_connections * cohesion_percent)
+                # Gaussian distribution creates natural falloff
+                offsets = blob_rng.normal(0.0, spread, size=(2, num_samples))
+                offsets[0] += x
+                offsets[1] += y
+                blob_samples.append(offsets)
+                # Weight by both connectivity and cohesion - creates intense hotspots
+                blob_weights.append(intra_connections * cohesion_percent)
             
             # Create contour/heatmap trace for this community (always create, control visibility via show_heatmap)
-            if blob_x and blob_y:
+            if blob_samples:
+                # Bin the weighted samples here so only the 50x50 density grid is written to the HTML
+                samples = np.concatenate(blob_samples, axis=1)
+                sample_weights = np.repeat(blob_weights, [a.shape[1] for a in blob_samples])
+                density, x_edges, y_edges = np.histogram2d(samples[0], samples[1], bins=50, weights=sample_weights)
+                
+
                 # Extract RGB values from community color
                 rgb_match = community_colors_rgb[comm % len(community_colors_rgb)]
                 import re
@@ -1349,16 +1479,14 @@ class FriendNetworkVisualizer:
                         [1, f'rgba({r},{g},{b},0.75)']      # Most intense
                     ]
                     
-                    blob_trace = go.Histogram2d(
-                        x=blob_x,
-                        y=blob_y,
-                        z=blob_intensity,
+                    # float32 arrays are written as base64 "bdata" blocks rather than decimal JSON
+                    blob_trace = go.Heatmap(
+                        x=((x_edges[:-1] + x_edges[1:]) / 2).astype(np.float32),
+                        y=((y_edges[:-1] + y_edges[1:]) / 2).astype(np.float32),
+                        z=density.T.astype(np.float32),  # histogram2d is indexed [x, y], Heatmap rows are y
                         colorscale=colorscale,
                         showscale=False,
                         hoverinfo='skip',
-                        nbinsx=50,  # Fewer bins for smoother gradients
-                        nbinsy=50,
-                        histfunc='sum',  # Sum creates accumulated density
                         name=f'Community {comm} background',
                         opacity=0.6,
                         showlegend=False,
@@ -1372,9 +1500,9 @@ class FriendNetworkVisualizer:
                     )
                     community_blob_traces.append(blob_trace)
         
-        # Create figure with backgrounds first (below), then edges, then nodes (top for interaction)
+        # Create figure with backgrounds first (below), then edges and their highlight, then nodes (top for interaction)
         fig = go.Figure(
-            data=community_blob_traces + [edge_trace, node_trace],
+            data=community_blob_traces + [edge_trace, highlight_trace, node_trace],
             layout=go.Layout(
                 title=dict(
                     text=f'<b>VRChat Friend Network</b><br>{len(self.friends)} friends, {self.graph.number_of_edges()} mutual connections<br><i>Click to highlight | Ctrl+Click for multi-select</i>',
@@ -1414,16 +1542,37 @@ class FriendNetworkVisualizer:
                 ),
                 plot_bgcolor='#1a1a2e' if dark_mode else 'white',
                 clickmode='event',  # Only fire click events, don't select traces
-                dragmode='pan'  # Default to pan mode, not select
+                dragmode='pan',  # Default to pan mode, not select
+                transition=dict(duration=0),  # Positions are precomputed, nothing to animate
+                uirevision='static'  # Keep the user's pan/zoom across restyles
             )
         )
         
         # Save to HTML with custom JavaScript for click interactions
-        html_content = fig.to_html(include_plotlyjs='cdn')
+        # Traces were built through the validating constructors already, skip the second pass
+        # Double-click still fires plotly_doubleclick (used to clear the selection), it just skips the axis reset;
+        # a 1:1 GL pixel ratio keeps the WebGL buffers small on high-DPI screens
+        html_content = fig.to_html(
+            include_plotlyjs='cdn',
+            validate=False,
+            config={'responsive': True, 'doubleClick': False, 'showTips': False, 'plotGlPixelRatio': 1}
+        )
         
         # Add custom JavaScript for node click highlighting with theme toggle
         initial_dark = 'true' if dark_mode else 'false'
         
+        # Trace order is fixed (heatmaps, edges, highlighted edges, nodes), so indices are emitted as constants
+        num_blob_traces = len(community_blob_traces)
+        js_edge_count = self.graph.number_of_edges() - nx.number_of_selfloops(self.graph)
+        
+        # Adjacency for the page script, in node-trace order (same CSR as above)
+        adj_off_json = _script_json(indptr)
+        adj_idx_json = _script_json(indices)
+        
+        # Names in node-trace order for the search box
+        names_json = _script_json(node_names)
+        names_lower_json = _script_json([n.lower() for n in node_names])
+        
         custom_js = f"""
 <style>
 body {{
@@ -1612,6 +1761,15 @@ body.dark-mode #search-status {{
     <div id="search-status"></div>
 </div>
 <script>
+// Generation-time constants
+var BACKGROUND_TRACE_IDX = {json.dumps(list(range(num_blob_traces)))};
+var EDGE_TRACE_IDX = {num_blob_traces};
+var HIGHLIGHT_TRACE_IDX = {num_blob_traces + 1};
+var NODE_TRACE_IDX = {num_blob_traces + 2};
+var NODE_COUNT = {len(all_nodes)};
+var EDGE_COUNT = {js_edge_count};
+var MAX_SEARCH_RESULTS = 20;
+
 // Theme toggle functionality
 var isDarkMode = {initial_dark};
 
@@ -1687,16 +1845,10 @@ function applyEdges() {{
         toggleBtn.textContent = areEdgesVisible ? 'Hide Edges' : 'Show Edges';
     }}
     
-    // Find the edge trace (not highlighted edges)
-    for (var i = 0; i < myPlot.data.length; i++) {{
-        if (myPlot.data[i].name === 'Mutual Friends') {{
-            // When hiding edges, set opacity to 0 (fully transparent)
-            // When showing, restore to default opacity or current selection opacity
-            var targetOpacity = areEdgesVisible ? 0.15 : 0;
-            Plotly.restyle(myPlot, {{'opacity': targetOpacity}}, [i]);
-            break;
-        }}
-    }}
+    // When hiding edges, set opacity to 0 (fully transparent)
+    // When showing, restore to default opacity or current selection opacity
+    var targetOpacity = areEdgesVisible ? 0.15 : 0;
+    Plotly.restyle(myPlot, {{'opacity': targetOpacity}}, [EDGE_TRACE_IDX]);
 }}
 
 function applyHeatmap() {{
@@ -1705,33 +1857,14 @@ function applyHeatmap() {{
     
     if (!myPlot || !myPlot.data) return;
     
-    // Find all background heatmap traces
-    var updates = {{}};
-    for (var i = 0; i < myPlot.data.length; i++) {{
-        if (myPlot.data[i].name && myPlot.data[i].name.includes('background')) {{
-            if (!updates['visible']) {{
-                updates['visible'] = [];
-            }}
-            updates['visible'][i] = isHeatmapVisible;
-        }}
-    }}
-    
     // Update button text
     if (toggleBtn) {{
         toggleBtn.textContent = isHeatmapVisible ? 'Hide Heatmap' : 'Show Heatmap';
     }}
     
-    // Apply visibility changes
-    if (Object.keys(updates).length > 0) {{
-        var indices = [];
-        for (var i = 0; i < myPlot.data.length; i++) {{
-            if (myPlot.data[i].name && myPlot.data[i].name.includes('background')) {{
-                indices.push(i);
-            }}
-        }}
-        if (indices.length > 0) {{
-            Plotly.restyle(myPlot, {{'visible': isHeatmapVisible}}, indices);
-        }}
+    // Apply visibility to all background heatmap traces
+    if (BACKGROUND_TRACE_IDX.length > 0) {{
+        Plotly.restyle(myPlot, {{'visible': isHeatmapVisible}}, BACKGROUND_TRACE_IDX);
     }}
 }}
 
@@ -1796,81 +1929,209 @@ document.addEventListener('DOMContentLoaded', function() {{
         // Apply edges visibility
         applyEdges();
         
-        // Find the edge and node traces by their names (since blob traces are added dynamically)
-        var edgeTraceIdx = -1;
-        var nodeTraceIdx = -1;
-        var backgroundTraceIndices = [];  // Track all background traces
+        // Trace indices are fixed at generation time
+        var edgeTraceIdx = EDGE_TRACE_IDX;
+        var highlightTraceIdx = HIGHLIGHT_TRACE_IDX;
+        var nodeTraceIdx = NODE_TRACE_IDX;
+        var backgroundTraceIndices = BACKGROUND_TRACE_IDX;
+        
+        // Adjacency in CSR form: neighbours of node i are adjIdx[adjOff[i] .. adjOff[i+1])
+        var adjOff = Int32Array.from({adj_off_json});
+        var adjIdx = Int32Array.from({adj_idx_json});
+        
+        // Friend names (and lowercased copies) in node-trace order
+        var friendNames = {names_json};
+        var friendNamesLower = {names_lower_json};
 """
         # Continue with rest of JavaScript (no variables, so use regular string)
         custom_js = custom_js + """
-        
-        for (var i = 0; i < myPlot.data.length; i++) {
-        if (myPlot.data[i].name === 'Mutual Friends') {
-            edgeTraceIdx = i;
-        } else if (myPlot.data[i].name === 'Friends') {
-            nodeTraceIdx = i;
-        } else if (myPlot.data[i].name && myPlot.data[i].name.includes('background')) {
-            backgroundTraceIndices.push(i);
+    
+    var nodes = myPlot.data[nodeTraceIdx];
+    
+    // Edge geometry as structure-of-arrays, plus a CSR index (node -> incident edge ids).
+    // Each undirected edge once, taken from the CSR rows (u < v)
+    var edgeCount = EDGE_COUNT;
+    var edgeU = new Int32Array(edgeCount);
+    var edgeV = new Int32Array(edgeCount);
+    var fillEdge = 0;
+    for (var u = 0; u < NODE_COUNT; u++) {
+        for (var k = adjOff[u]; k < adjOff[u + 1]; k++) {
+            if (u < adjIdx[k]) {
+                edgeU[fillEdge] = u;
+                edgeV[fillEdge] = adjIdx[k];
+                fillEdge++;
+            }
         }
     }
+    var edgeX1 = new Float32Array(edgeCount);
+    var edgeY1 = new Float32Array(edgeCount);
+    var edgeX2 = new Float32Array(edgeCount);
+    var edgeY2 = new Float32Array(edgeCount);
+    var nodeEdgeOffsets = new Int32Array(NODE_COUNT + 1);
+    for (var e = 0; e < edgeCount; e++) {
+        var u = edgeU[e];
+        var v = edgeV[e];
+        edgeX1[e] = nodes.x[u];
+        edgeY1[e] = nodes.y[u];
+        edgeX2[e] = nodes.x[v];
+        edgeY2[e] = nodes.y[v];
+        nodeEdgeOffsets[u + 1]++;
+        nodeEdgeOffsets[v + 1]++;
+    }
+    for (var i = 0; i < NODE_COUNT; i++) {
+        nodeEdgeOffsets[i + 1] += nodeEdgeOffsets[i];
+    }
+    var nodeEdgeList = new Int32Array(2 * edgeCount);
+    var fillPos = nodeEdgeOffsets.slice(0, NODE_COUNT);
+    for (var e = 0; e < edgeCount; e++) {
+        nodeEdgeList[fillPos[edgeU[e]]++] = e;
+        nodeEdgeList[fillPos[edgeV[e]]++] = e;
+    }
     
-    // Store original background trace properties to restore them
-    var originalBackgroundProps = {};
-    for (var i = 0; i < backgroundTraceIndices.length; i++) {
-        var idx = backgroundTraceIndices[i];
-        originalBackgroundProps[idx] = {
-            opacity: myPlot.data[idx].opacity,
-            visible: myPlot.data[idx].visible
-        };
+    // Reusable coordinate storage for highlighted edges; grown (doubling) only when a
+    // selection needs more room than any before it
+    function createSegmentPool() {
+        return {bufX: new Float32Array(0), bufY: new Float32Array(0)};
     }
     
-    if (edgeTraceIdx === -1 || nodeTraceIdx === -1) {
-        console.error('Could not find edge or node traces');
-        return;
+    // Line segments for the given edge ids; NaN separators break the line between segments.
+    // Written into pool and returned as views over it, so no arrays are built per selection.
+    function edgeSegments(edgeIds, count, pool) {
+        var needed = 3 * count;
+        if (pool.bufX.length < needed) {
+            var capacity = Math.max(needed, 2 * pool.bufX.length);
+            pool.bufX = new Float32Array(capacity);
+            pool.bufY = new Float32Array(capacity);
+        }
+        var segX = pool.bufX;
+        var segY = pool.bufY;
+        for (var k = 0; k < count; k++) {
+            var e = edgeIds[k];
+            segX[3 * k] = edgeX1[e];
+            segX[3 * k + 1] = edgeX2[e];
+            segX[3 * k + 2] = NaN;
+            segY[3 * k] = edgeY1[e];
+            segY[3 * k + 1] = edgeY2[e];
+            segY[3 * k + 2] = NaN;
+        }
+        return {x: segX.subarray(0, needed), y: segY.subarray(0, needed)};
     }
     
-    var edges = myPlot.data[edgeTraceIdx];
-    var nodes = myPlot.data[nodeTraceIdx];
+    // Union of the selected nodes' edges, each edge listed once
+    var edgeMark = new Uint8Array(edgeCount);
+    var selectionEdgeIds = new Int32Array(edgeCount);
+    var selectionSegmentPool = createSegmentPool();
+    function selectionHighlightSegments(nodeIndices) {
+        var count = 0;
+        for (var i = 0; i < nodeIndices.length; i++) {
+            var n = nodeIndices[i];
+            for (var k = nodeEdgeOffsets[n]; k < nodeEdgeOffsets[n + 1]; k++) {
+                var e = nodeEdgeList[k];
+                if (!edgeMark[e]) {
+                    edgeMark[e] = 1;
+                    selectionEdgeIds[count++] = e;
+                }
+            }
+        }
+        for (var i = 0; i < count; i++) {
+            edgeMark[selectionEdgeIds[i]] = 0;
+        }
+        return edgeSegments(selectionEdgeIds, count, selectionSegmentPool);
+    }
+    
+    // Level of detail for the edge trace on large graphs: edges are ordered along a Morton
+    // (Z-order) curve of their midpoints and grouped into blocks with bounding boxes. After a
+    // zoom or pan only blocks overlapping the view are scanned, and only edges crossing the
+    // view are sent to Plotly, so the vertex count follows what is on screen.
+    var EDGE_LOD_MIN_EDGES = 5000;
+    var EDGE_LOD_BLOCK = 64;
     
-    // Build coordinate to node index map for O(1) lookup
-    var coordToIdx = {};
-    for (var i = 0; i < nodes.x.length; i++) {
-        var key = nodes.x[i].toFixed(2) + ',' + nodes.y[i].toFixed(2);
-        coordToIdx[key] = i;
+    function spreadBits(v) {
+        v &= 0xFFFF;
+        v = (v | (v << 8)) & 0x00FF00FF;
+        v = (v | (v << 4)) & 0x0F0F0F0F;
+        v = (v | (v << 2)) & 0x33333333;
+        v = (v | (v << 1)) & 0x55555555;
+        return v;
     }
     
-    // Build edge data structure for quick lookup
-    var edgeData = [];
-    var adjacency = {};  // Map node index to list of connected node indices
-    
-    // Parse edge data (every 3 points: x1, x2, null)
-    for (var i = 0; i < edges.x.length; i += 3) {
-        if (edges.x[i] !== null && edges.x[i+1] !== null) {
-            var x1 = edges.x[i];
-            var y1 = edges.y[i];
-            var x2 = edges.x[i+1];
-            var y2 = edges.y[i+1];
+    if (edgeCount >= EDGE_LOD_MIN_EDGES) {
+        var minX = Infinity, minY = Infinity, maxX = -Infinity, maxY = -Infinity;
+        for (var i = 0; i < NODE_COUNT; i++) {
+            if (nodes.x[i] < minX) minX = nodes.x[i];
+            if (nodes.x[i] > maxX) maxX = nodes.x[i];
+            if (nodes.y[i] < minY) minY = nodes.y[i];
+            if (nodes.y[i] > maxY) maxY = nodes.y[i];
+        }
+        var scaleX = 65535 / Math.max(maxX - minX, 1e-9);
+        var scaleY = 65535 / Math.max(maxY - minY, 1e-9);
+        
+        var mortonKey = new Uint32Array(edgeCount);
+        var lodOrder = new Int32Array(edgeCount);
+        for (var e = 0; e < edgeCount; e++) {
+            var qx = Math.floor(((edgeX1[e] + edgeX2[e]) / 2 - minX) * scaleX);
+            var qy = Math.floor(((edgeY1[e] + edgeY2[e]) / 2 - minY) * scaleY);
+            mortonKey[e] = (spreadBits(qx) | (spreadBits(qy) << 1)) >>> 0;
+            lodOrder[e] = e;
+        }
+        lodOrder.sort(function(a, b) { return mortonKey[a] - mortonKey[b]; });
+        mortonKey = null;
+        
+        var blockCount = Math.ceil(edgeCount / EDGE_LOD_BLOCK);
+        var blockMinX = new Float32Array(blockCount).fill(Infinity);
+        var blockMinY = new Float32Array(blockCount).fill(Infinity);
+        var blockMaxX = new Float32Array(blockCount).fill(-Infinity);
+        var blockMaxY = new Float32Array(blockCount).fill(-Infinity);
+        for (var k = 0; k < edgeCount; k++) {
+            var e = lodOrder[k];
+            var b = (k / EDGE_LOD_BLOCK) | 0;
+            blockMinX[b] = Math.min(blockMinX[b], edgeX1[e], edgeX2[e]);
+            blockMaxX[b] = Math.max(blockMaxX[b], edgeX1[e], edgeX2[e]);
+            blockMinY[b] = Math.min(blockMinY[b], edgeY1[e], edgeY2[e]);
+            blockMaxY[b] = Math.max(blockMaxY[b], edgeY1[e], edgeY2[e]);
+        }
+        
+        var lodEdgeIds = new Int32Array(edgeCount);
+        var lodSegmentPool = createSegmentPool();
+        var lodView = null;     // [x0, x1, y0, y1] last applied
+        var lodFrame = null;
+        
+        function updateEdgeLod() {
+            lodFrame = null;
+            var xRange = myPlot.layout.xaxis && myPlot.layout.xaxis.range;
+            var yRange = myPlot.layout.yaxis && myPlot.layout.yaxis.range;
+            if (!xRange || !yRange) return;
             
-            // Fast O(1) lookup using coordinate map
-            var key1 = x1.toFixed(2) + ',' + y1.toFixed(2);
-            var key2 = x2.toFixed(2) + ',' + y2.toFixed(2);
-            var node1Idx = coordToIdx[key1];
-            var node2Idx = coordToIdx[key2];
+            var x0 = Math.min(xRange[0], xRange[1]), x1 = Math.max(xRange[0], xRange[1]);
+            var y0 = Math.min(yRange[0], yRange[1]), y1 = Math.max(yRange[0], yRange[1]);
+            if (lodView && lodView[0] === x0 && lodView[1] === x1 && lodView[2] === y0 && lodView[3] === y1) return;
+            lodView = [x0, x1, y0, y1];
             
-            if (node1Idx !== undefined && node2Idx !== undefined) {
-                // Build adjacency list
-                if (!adjacency[node1Idx]) adjacency[node1Idx] = [];
-                if (!adjacency[node2Idx]) adjacency[node2Idx] = [];
-                adjacency[node1Idx].push(node2Idx);
-                adjacency[node2Idx].push(node1Idx);
-                
-                edgeData.push({
-                    x1: x1, y1: y1,
-                    x2: x2, y2: y2,
-                    nodes: [node1Idx, node2Idx]
-                });
+            var count = 0;
+            for (var b = 0; b < blockCount; b++) {
+                if (blockMaxX[b] < x0 || blockMinX[b] > x1 || blockMaxY[b] < y0 || blockMinY[b] > y1) continue;
+                var end = Math.min((b + 1) * EDGE_LOD_BLOCK, edgeCount);
+                for (var k = b * EDGE_LOD_BLOCK; k < end; k++) {
+                    var e = lodOrder[k];
+                    if (Math.max(edgeX1[e], edgeX2[e]) < x0 || Math.min(edgeX1[e], edgeX2[e]) > x1 ||
+                        Math.max(edgeY1[e], edgeY2[e]) < y0 || Math.min(edgeY1[e], edgeY2[e]) > y1) continue;
+                    lodEdgeIds[count++] = e;
+                }
+            }
+            
+            var segments = edgeSegments(lodEdgeIds, count, lodSegmentPool);
+            Plotly.restyle(myPlot, {'x': [segments.x], 'y': [segments.y]}, [edgeTraceIdx]);
+        }
+        
+        function scheduleEdgeLod() {
+            if (lodFrame === null) {
+                lodFrame = requestAnimationFrame(updateEdgeLod);
             }
         }
+        
+        // Zoom/pan arrive as relayout; re-centering on a search result arrives as update
+        myPlot.on('plotly_relayout', scheduleEdgeLod);
+        myPlot.on('plotly_update', scheduleEdgeLod);
     }
     
     var selectedNode = null;
@@ -1879,7 +2140,88 @@ document.addEventListener('DOMContentLoaded', function() {{
     
     // Store original node opacity
     if (originalNodeOpacity === null) {
-        originalNodeOpacity = Array(nodes.x.length).fill(0.95);
+        originalNodeOpacity = Array(NODE_COUNT).fill(0.95);
+    }
+    
+    // Border colours are stored as palette codes; colorBuf holds the strings handed to Plotly
+    var BORDER_WHITE = 0, BORDER_ORANGE = 1, BORDER_GOLD = 2, BORDER_PINK = 3;
+    var BORDER_PALETTE = Object.freeze(['white', '#FF6B00', '#FFD700', '#FF1493']);
+    
+    // Node style buffers are allocated once and refilled on every selection
+    var opacBuf = new Float32Array(NODE_COUNT);
+    var widthBuf = new Uint8Array(NODE_COUNT);
+    var colorCodeBuf = new Uint8Array(NODE_COUNT);
+    var colorBuf = new Array(NODE_COUNT);
+    
+    function resetStyleBuffers() {
+        opacBuf.fill(0.2);
+        widthBuf.fill(1);
+        colorCodeBuf.fill(BORDER_WHITE);
+    }
+    
+    // Small LRU of finished single-node selections. Map keeps insertion order, so a hit is
+    // re-inserted to mark it most recent; once full, the oldest entry's buffers are recycled.
+    var SELECTION_CACHE_LIMIT = 64;
+    function createSelectionCache() {
+        var entries = new Map();
+        return {
+            get: function(nodeIdx) {
+                var entry = entries.get(nodeIdx);
+                if (entry) {
+                    entries.delete(nodeIdx);
+                    entries.set(nodeIdx, entry);
+                }
+                return entry;
+            },
+            set: function(nodeIdx, entry) {
+                entries.set(nodeIdx, entry);
+            },
+            recycle: function() {
+                if (entries.size < SELECTION_CACHE_LIMIT) return null;
+                var oldest = entries.keys().next().value;
+                var entry = entries.get(oldest);
+                entries.delete(oldest);
+                return entry;
+            }
+        };
+    }
+    var clickSelectionCache = createSelectionCache();
+    var searchSelectionCache = createSelectionCache();
+    
+    // Node styling and edge geometry for one selected node, memoized per node
+    function singleSelection(cache, nodeIdx, neighborWidth, neighborColor) {
+        var entry = cache.get(nodeIdx);
+        if (entry) return entry;
+        
+        entry = cache.recycle() || {
+            opacity: new Float32Array(NODE_COUNT),
+            widths: new Uint8Array(NODE_COUNT),
+            colorCodes: new Uint8Array(NODE_COUNT),
+            segments: createSegmentPool()
+        };
+        entry.opacity.fill(0.2);
+        entry.widths.fill(1);
+        entry.colorCodes.fill(BORDER_WHITE);
+        
+        // Selected node in gold, connected nodes in the caller's neighbour style
+        entry.opacity[nodeIdx] = 1.0;
+        entry.widths[nodeIdx] = 6;
+        entry.colorCodes[nodeIdx] = BORDER_GOLD;
+        for (var k = adjOff[nodeIdx]; k < adjOff[nodeIdx + 1]; k++) {
+            var neighbor = adjIdx[k];
+            entry.opacity[neighbor] = 1.0;
+            entry.widths[neighbor] = neighborWidth;
+            entry.colorCodes[neighbor] = neighborColor;
+        }
+        
+        var start = nodeEdgeOffsets[nodeIdx];
+        var end = nodeEdgeOffsets[nodeIdx + 1];
+        var segments = edgeSegments(nodeEdgeList.subarray(start, end), end - start, entry.segments);
+        entry.x = segments.x;
+        entry.y = segments.y;
+        
+        cache.set(nodeIdx, entry);
+        return entry;
     }
     
     // Handle clicks
@@ -1933,213 +2275,177 @@ document.addEventListener('DOMContentLoaded', function() {{
         }
     });
     
-    // Function to ensure background traces stay unchanged (batch operation)
-    function preserveBackgrounds() {
-        if (backgroundTraceIndices.length === 0) return;
-        var opacities = backgroundTraceIndices.map(function(idx) { return originalBackgroundProps[idx].opacity; });
-        var visibles = backgroundTraceIndices.map(function(idx) { return originalBackgroundProps[idx].visible; });
-        Plotly.restyle(myPlot, {
-            opacity: opacities,
-            visible: visibles
-        }, backgroundTraceIndices);
+    // Everything a selection can change lives in viewState. Handlers edit it and call
+    // commitView(); once per animation frame the whole state goes out as a single
+    // Plotly.update, so an interaction costs one redraw however many traces it touched.
+    // xRange/yRange are one-shot re-centering requests and are cleared once applied.
+    var viewState = {
+        edgesOpacity: areEdgesVisible ? 0.15 : 0,
+        nodeOpacity: originalNodeOpacity,
+        nodeWidths: 2,
+        nodeColors: 'white',
+        highlight: {x: [], y: [], visible: false},
+        xRange: null,
+        yRange: null
+    };
+    var commitFrameRequested = false;
+    
+    function commitView() {
+        if (!commitFrameRequested) {
+            commitFrameRequested = true;
+            requestAnimationFrame(flushView);
+        }
     }
     
-    function highlightSingleNode(nodeIdx) {
-        // Build highlighted edges for selected node
-        var highlightX = [];
-        var highlightY = [];
-        
-        var connected = adjacency[nodeIdx] || [];
-        for (var i = 0; i < edgeData.length; i++) {
-            var edge = edgeData[i];
-            if (edge.nodes[0] === nodeIdx || edge.nodes[1] === nodeIdx) {
-                highlightX.push(edge.x1, edge.x2, null);
-                highlightY.push(edge.y1, edge.y2, null);
-            }
+    function flushView() {
+        commitFrameRequested = false;
+        var highlight = viewState.highlight;
+        var layout = {};
+        if (viewState.xRange) {
+            layout['xaxis.range'] = viewState.xRange;
+            layout['yaxis.range'] = viewState.yRange;
+            viewState.xRange = null;
+            viewState.yRange = null;
         }
         
-        // Build node styling updates efficiently
-        var newNodeOpacity = Array(nodes.x.length).fill(0.2);
-        var newBorderWidths = Array(nodes.x.length).fill(1);
-        var newBorderColors = Array(nodes.x.length).fill('white');
-        
-        // Highlight selected node with gold
-        newNodeOpacity[nodeIdx] = 1.0;
-        newBorderWidths[nodeIdx] = 6;
-        newBorderColors[nodeIdx] = '#FFD700';
-        
-        // Highlight connected nodes with orange
-        for (var i = 0; i < connected.length; i++) {
-            newNodeOpacity[connected[i]] = 1.0;
-            newBorderWidths[connected[i]] = 4;
-            newBorderColors[connected[i]] = '#FFD700';
+        // Values are matched to traceIndices by position; undefined leaves a trace untouched.
+        // Hidden highlight geometry is not resent.
+        Plotly.update(myPlot, {
+            'opacity': [viewState.edgesOpacity, undefined, undefined],
+            'x': [undefined, highlight.visible ? highlight.x : undefined, undefined],
+            'y': [undefined, highlight.visible ? highlight.y : undefined, undefined],
+            'visible': [undefined, highlight.visible, undefined],
+            'marker.opacity': [undefined, undefined, viewState.nodeOpacity],
+            'marker.line.width': [undefined, undefined, viewState.nodeWidths],
+            'marker.line.color': [undefined, undefined, viewState.nodeColors]
+        }, layout, [edgeTraceIdx, highlightTraceIdx, nodeTraceIdx]);
+    }
+    
+    // Record a selection (dimmed edges, highlighted edges, node styling) in viewState
+    function applyHighlight(highlightX, highlightY, newNodeOpacity, newBorderWidths, borderColorCodes) {
+        // Expand palette codes into the shared colour array Plotly reads
+        for (var i = 0; i < borderColorCodes.length; i++) {
+            colorBuf[i] = BORDER_PALETTE[borderColorCodes[i]];
         }
         
-        // Single batch update for all visual changes
-        var highlightTraceIdx = -1;
-        var currentNodeTraceIdx = -1;
+        viewState.edgesOpacity = areEdgesVisible ? 0.03 : 0;
+        viewState.highlight.x = highlightX;
+        viewState.highlight.y = highlightY;
+        viewState.highlight.visible = true;
+        viewState.nodeOpacity = newNodeOpacity;
+        viewState.nodeWidths = newBorderWidths;
+        viewState.nodeColors = colorBuf;
+        commitView();
+    }
+    
+    function highlightSingleNode(nodeIdx) {
+        // Selected node and its connections in gold
+        var sel = singleSelection(clickSelectionCache, nodeIdx, 4, BORDER_GOLD);
+        applyHighlight(sel.x, sel.y, sel.opacity, sel.widths, sel.colorCodes);
+    }
+    
+    // Neighbour bitsets (one bit per node) for common-friend intersections. Built lazily per
+    // node while the total stays within BITSET_BUDGET_BYTES; past that, sorted CSR rows are merged.
+    var BITSET_BUDGET_BYTES = 16 * 1024 * 1024;
+    var bitsetWords = (NODE_COUNT + 31) >>> 5;
+    var bitsetCache = {};
+    var bitsetBytes = 0;
+    var bitsetScratch = new Uint32Array(bitsetWords);
+    
+    function neighborBitset(nodeIdx) {
+        var bits = bitsetCache[nodeIdx];
+        if (bits) return bits;
+        if (bitsetBytes + bitsetWords * 4 > BITSET_BUDGET_BYTES) return null;
+        bits = new Uint32Array(bitsetWords);
+        for (var k = adjOff[nodeIdx]; k < adjOff[nodeIdx + 1]; k++) {
+            bits[adjIdx[k] >>> 5] |= 1 << (adjIdx[k] & 31);
+        }
+        bitsetCache[nodeIdx] = bits;
+        bitsetBytes += bitsetWords * 4;
+        return bits;
+    }
+    
+    // Nodes adjacent to every node in nodeList, in ascending index order
+    function commonNeighbors(nodeList) {
+        var result = [];
+        var sets = [];
+        for (var i = 0; i < nodeList.length; i++) {
+            var bits = neighborBitset(nodeList[i]);
+            if (!bits) break;
+            sets.push(bits);
+        }
         
-        // Find both highlight and node traces dynamically
-        for (var i = 0; i < myPlot.data.length; i++) {
-            if (myPlot.data[i].name === 'Highlighted Edges') {
-                highlightTraceIdx = i;
+        if (sets.length === nodeList.length) {
+            bitsetScratch.set(sets[0]);
+            for (var i = 1; i < sets.length; i++) {
+                for (var w = 0; w < bitsetWords; w++) bitsetScratch[w] &= sets[i][w];
             }
-            if (myPlot.data[i].name === 'Friends') {
-                currentNodeTraceIdx = i;
+            for (var w = 0; w < bitsetWords; w++) {
+                var word = bitsetScratch[w];
+                while (word) {
+                    var low = word & -word;
+                    result.push((w << 5) + 31 - Math.clz32(low));
+                    word ^= low;
+                }
             }
+            return result;
         }
         
-        // Check if highlight trace exists
-        if (highlightTraceIdx === -1) {
-            // Insert highlight trace AFTER edges but BEFORE nodes (so it's behind dots)
-            var insertPosition = edgeTraceIdx + 1;
-            Plotly.addTraces(myPlot, {
-                x: highlightX,
-                y: highlightY,
-                mode: 'lines',
-                line: {color: 'rgba(220,80,80,0.8)', width: 2},
-                hoverinfo: 'none',
-                showlegend: false,
-                name: 'Highlighted Edges'
-            }, insertPosition);
-            // Re-find node trace after insertion
-            for (var i = 0; i < myPlot.data.length; i++) {
-                if (myPlot.data[i].name === 'Friends') {
-                    currentNodeTraceIdx = i;
-                    break;
+        // Over budget: merge-intersect the sorted neighbour rows
+        result = Array.from(adjIdx.subarray(adjOff[nodeList[0]], adjOff[nodeList[0] + 1]));
+        for (var i = 1; i < nodeList.length && result.length > 0; i++) {
+            var k = adjOff[nodeList[i]];
+            var end = adjOff[nodeList[i] + 1];
+            var kept = [];
+            for (var r = 0; r < result.length && k < end; ) {
+                if (result[r] === adjIdx[k]) {
+                    kept.push(result[r]);
+                    r++;
+                    k++;
+                } else if (result[r] < adjIdx[k]) {
+                    r++;
+                } else {
+                    k++;
                 }
             }
-            // Then update edge and node traces (respect edges visibility setting)
-            var edgeOpacity = areEdgesVisible ? 0.03 : 0;
-            Plotly.restyle(myPlot, {'opacity': edgeOpacity}, [edgeTraceIdx]);
-            Plotly.restyle(myPlot, {
-                'marker.opacity': [newNodeOpacity],
-                'marker.line.width': [newBorderWidths],
-                'marker.line.color': [newBorderColors]
-            }, [currentNodeTraceIdx]);
-        } else {
-            // Highlight trace exists - update all three separately (respect edges visibility setting)
-            var edgeOpacity = areEdgesVisible ? 0.03 : 0;
-            Plotly.restyle(myPlot, {
-                'opacity': edgeOpacity
-            }, [edgeTraceIdx]);
-            Plotly.restyle(myPlot, {
-                'x': [highlightX],
-                'y': [highlightY]
-            }, [highlightTraceIdx]);
-            Plotly.restyle(myPlot, {
-                'marker.opacity': [newNodeOpacity],
-                'marker.line.width': [newBorderWidths],
-                'marker.line.color': [newBorderColors]
-            }, [currentNodeTraceIdx]);
+            result = kept;
         }
+        return result;
     }
     
     function highlightMultipleNodes() {
-        // Calculate common connections efficiently using Set intersection
+        // Common connections across all selected nodes
         var commonConnections = [];
         if (selectedNodes.length > 1) {
-            var firstNodeConnections = new Set(adjacency[selectedNodes[0]] || []);
-            for (var i = 1; i < selectedNodes.length; i++) {
-                var currentConnections = adjacency[selectedNodes[i]] || [];
-                // Fast Set-based intersection
-                var newIntersection = new Set();
-                for (var j = 0; j < currentConnections.length; j++) {
-                    if (firstNodeConnections.has(currentConnections[j])) {
-                        newIntersection.add(currentConnections[j]);
-                    }
-                }
-                firstNodeConnections = newIntersection;
-            }
-            commonConnections = Array.from(firstNodeConnections);
+            commonConnections = commonNeighbors(selectedNodes);
         }
         
-        // Build highlighted edges using Set for fast lookup
-        var selectedSet = new Set(selectedNodes);
-        var highlightX = [];
-        var highlightY = [];
-        
-        for (var i = 0; i < edgeData.length; i++) {
-            var edge = edgeData[i];
-            if (selectedSet.has(edge.nodes[0]) || selectedSet.has(edge.nodes[1])) {
-                highlightX.push(edge.x1, edge.x2, null);
-                highlightY.push(edge.y1, edge.y2, null);
-            }
-        }
+        // Build highlighted edges from the selected nodes' incident edge lists
+        var segments = selectionHighlightSegments(selectedNodes);
+        var highlightX = segments.x;
+        var highlightY = segments.y;
         
         // Build node styling - dim all first
-        var newNodeOpacity = Array(nodes.x.length).fill(0.2);
-        var newBorderWidths = Array(nodes.x.length).fill(1);
-        var newBorderColors = Array(nodes.x.length).fill('white');
+        resetStyleBuffers();
+        var newNodeOpacity = opacBuf;
+        var newBorderWidths = widthBuf;
+        var newBorderColors = colorCodeBuf;
         
         // Highlight selected nodes with thick gold borders
         for (var i = 0; i < selectedNodes.length; i++) {
             newNodeOpacity[selectedNodes[i]] = 1.0;
             newBorderWidths[selectedNodes[i]] = 6;
-            newBorderColors[selectedNodes[i]] = '#FF1493';  // Pink for selected
+            newBorderColors[selectedNodes[i]] = BORDER_PINK;  // Pink for selected
         }
         
         // Highlight common mutual friends with gold borders
         for (var i = 0; i < commonConnections.length; i++) {
             newNodeOpacity[commonConnections[i]] = 1.0;
             newBorderWidths[commonConnections[i]] = 5;
-            newBorderColors[commonConnections[i]] = '#FFD700';  // Gold for common mutuals
-        }
-        
-        // Find highlight and node trace indices
-        var highlightTraceIdx = -1;
-        var currentNodeTraceIdx = -1;
-        for (var i = 0; i < myPlot.data.length; i++) {
-            if (myPlot.data[i].name === 'Highlighted Edges') {
-                highlightTraceIdx = i;
-            }
-            if (myPlot.data[i].name === 'Friends') {
-                currentNodeTraceIdx = i;
-            }
+            newBorderColors[commonConnections[i]] = BORDER_GOLD;  // Gold for common mutuals
         }
         
-        // Check if highlight trace exists
-        if (highlightTraceIdx === -1) {
-            // Insert highlight trace AFTER edges but BEFORE nodes
-            var insertPosition = edgeTraceIdx + 1;
-            Plotly.addTraces(myPlot, {
-                x: highlightX,
-                y: highlightY,
-                mode: 'lines',
-                line: {color: 'rgba(220,80,80,0.8)', width: 2},
-                hoverinfo: 'none',
-                showlegend: false,
-                name: 'Highlighted Edges'
-            }, insertPosition);
-            // Re-find node trace after insertion
-            for (var i = 0; i < myPlot.data.length; i++) {
-                if (myPlot.data[i].name === 'Friends') {
-                    currentNodeTraceIdx = i;
-                    break;
-                }
-            }
-            // Update traces (respect edges visibility setting)
-            var edgeOpacity = areEdgesVisible ? 0.03 : 0;
-            Plotly.restyle(myPlot, {'opacity': edgeOpacity}, [edgeTraceIdx]);
-            Plotly.restyle(myPlot, {
-                'marker.opacity': [newNodeOpacity],
-                'marker.line.width': [newBorderWidths],
-                'marker.line.color': [newBorderColors]
-            }, [currentNodeTraceIdx]);
-        } else {
-            // Update existing traces (respect edges visibility setting)
-            var edgeOpacity = areEdgesVisible ? 0.03 : 0;
-            Plotly.restyle(myPlot, {'opacity': edgeOpacity}, [edgeTraceIdx]);
-            Plotly.restyle(myPlot, {
-                'x': [highlightX],
-                'y': [highlightY]
-            }, [highlightTraceIdx]);
-            Plotly.restyle(myPlot, {
-                'marker.opacity': [newNodeOpacity],
-                'marker.line.width': [newBorderWidths],
-                'marker.line.color': [newBorderColors]
-            }, [currentNodeTraceIdx]);
-        }
+        applyHighlight(highlightX, highlightY, newNodeOpacity, newBorderWidths, newBorderColors);
         
         // Show status message
         if (selectedNodes.length > 1 && commonConnections.length > 0) {
@@ -2154,28 +2460,14 @@ document.addEventListener('DOMContentLoaded', function() {{
     // Continue with remaining functions...
     
     function resetSelection() {
-        // Restore edge opacity (respect edges visibility setting)
-        var edgeOpacity = areEdgesVisible ? 0.15 : 0;
-        Plotly.restyle(myPlot, {'opacity': [edgeOpacity]}, [edgeTraceIdx]);
-        
-        // Remove highlight trace if it exists
-        var highlightTraceIdx = -1;
-        for (var i = 0; i < myPlot.data.length; i++) {
-            if (myPlot.data[i].name === 'Highlighted Edges') {
-                highlightTraceIdx = i;
-                break;
-            }
-        }
-        if (highlightTraceIdx !== -1) {
-            Plotly.deleteTraces(myPlot, highlightTraceIdx);
-        }
-        
-        // Reset nodes
-        Plotly.restyle(myPlot, {
-            'marker.opacity': [originalNodeOpacity],
-            'marker.line.width': [2],
-            'marker.line.color': ['white']
-        }, [nodeTraceIdx]);
+        // Restore edge opacity (respect edges visibility setting), hide highlighted
+        // edges (the trace itself is kept for the next selection) and reset nodes
+        viewState.edgesOpacity = areEdgesVisible ? 0.15 : 0;
+        viewState.highlight.visible = false;
+        viewState.nodeOpacity = originalNodeOpacity;
+        viewState.nodeWidths = 2;
+        viewState.nodeColors = 'white';
+        commitView();
         
         selectedNode = null;
         selectedNodes = [];
@@ -2187,80 +2479,15 @@ document.addEventListener('DOMContentLoaded', function() {{
         // Simulate clicking on a node
         selectedNode = nodeIdx;
         
-        // Dim the original edge trace
-        Plotly.restyle(myPlot, {'opacity': [0.03]}, [edgeTraceIdx]);
-        
-        // Build highlighted edges
-        var highlightX = [];
-        var highlightY = [];
-        
-        for (var i = 0; i < edgeData.length; i++) {
-            var edge = edgeData[i];
-            if (edge.nodes[0] === nodeIdx || edge.nodes[1] === nodeIdx) {
-                highlightX.push(edge.x1, edge.x2, null);
-                highlightY.push(edge.y1, edge.y2, null);
-            }
-        }
-        
-        // Add or update highlight trace
-        var highlightTrace = {
-            x: highlightX,
-            y: highlightY,
-            mode: 'lines',
-            line: {color: 'rgba(220,80,80,0.8)', width: 2},
-            hoverinfo: 'none',
-            showlegend: false,
-            name: 'Highlighted Edges'
-        };
-        
-        var highlightTraceIdx = -1;
-        for (var i = 0; i < myPlot.data.length; i++) {
-            if (myPlot.data[i].name === 'Highlighted Edges') {
-                highlightTraceIdx = i;
-                break;
-            }
-        }
-        
-        if (highlightTraceIdx !== -1) {
-            Plotly.restyle(myPlot, {
-                x: [highlightX],
-                y: [highlightY]
-            }, [highlightTraceIdx]);
-        } else {
-            Plotly.addTraces(myPlot, highlightTrace);
-        }
-        
-        // Dim all nodes
-        var newNodeOpacity = Array(nodes.x.length).fill(0.2);
-        var newBorderWidths = Array(nodes.x.length).fill(1);
-        var newBorderColors = Array(nodes.x.length).fill('white');
-        
-        // Highlight selected node
-        newNodeOpacity[nodeIdx] = 1.0;
-        newBorderWidths[nodeIdx] = 6;
-        newBorderColors[nodeIdx] = '#FFD700';
-        
-        // Highlight connected nodes
-        var connected = adjacency[nodeIdx] || [];
-        for (var i = 0; i < connected.length; i++) {
-            newNodeOpacity[connected[i]] = 1.0;
-            newBorderWidths[connected[i]] = 3;
-            newBorderColors[connected[i]] = '#FF6B00';
-        }
-        
-        Plotly.restyle(myPlot, {
-            'marker.opacity': [newNodeOpacity],
-            'marker.line.width': [newBorderWidths],
-            'marker.line.color': [newBorderColors]
-        }, [nodeTraceIdx]);
+        // Selected node in gold, connected nodes in orange
+        var sel = singleSelection(searchSelectionCache, nodeIdx, 3, BORDER_ORANGE);
         
-        // Center on the node
+        // Dim edges, show highlights, restyle nodes and center on the node in one frame
         var nodeX = nodes.x[nodeIdx];
         var nodeY = nodes.y[nodeIdx];
-        Plotly.relayout(myPlot, {
-            'xaxis.range': [nodeX - 300, nodeX + 300],
-            'yaxis.range': [nodeY - 300, nodeY + 300]
-        });
+        viewState.xRange = [nodeX - 300, nodeX + 300];
+        viewState.yRange = [nodeY - 300, nodeY + 300];
+        applyHighlight(sel.x, sel.y, sel.opacity, sel.widths, sel.colorCodes);
     }
     
     // Search functionality
@@ -2270,78 +2497,175 @@ document.addEventListener('DOMContentLoaded', function() {{
     
     // Build searchable friend list
     var friendList = [];
-    for (var i = 0; i < nodes.text.length; i++) {
-        var nameMatch = nodes.text[i].match(/<b>([^<]+)<\\/b>/);
-        if (nameMatch) {
+    for (var i = 0; i < friendNames.length; i++) {
+        if (friendNames[i]) {
             friendList.push({
-                name: nameMatch[1],
+                name: friendNames[i],
+                lower: friendNamesLower[i],
                 index: i
             });
         }
     }
     
+    // Sort once so every index below yields matches already in display order
+    friendList.sort(function(a, b) {
+        return a.name.localeCompare(b.name) || a.index - b.index;
+    });
+    
+    // Prefix trie over lowercased names: each node lists every friend whose name starts with its path.
+    // Trigram index (trigram -> friend positions) narrows substring searches to a few candidates.
+    var searchTrie = {children: {}, ids: []};
+    var trigramIndex = {};
+    var lowerNames = [];
+    for (var i = 0; i < friendList.length; i++) {
+        var lower = friendList[i].lower;
+        lowerNames.push(lower);
+        
+        var trieNode = searchTrie;
+        for (var c = 0; c < lower.length; c++) {
+            var ch = lower[c];
+            if (!trieNode.children[ch]) {
+                trieNode.children[ch] = {children: {}, ids: []};
+            }
+            trieNode = trieNode.children[ch];
+            trieNode.ids.push(i);
+        }
+        
+        for (var c = 0; c + 3 <= lower.length; c++) {
+            var gram = lower.substr(c, 3);
+            var posting = trigramIndex[gram];
+            if (!posting) {
+                trigramIndex[gram] = [i];
+            } else if (posting[posting.length - 1] !== i) {
+                posting.push(i);
+            }
+        }
+    }
+    
+    // Previous query and its matches; a query that extends it can only narrow that set
+    var lastQuery = '';
+    var lastMatchIds = [];
+    
+    // Positions in friendList of names matching query, ranked (starts with query first, then contains)
+    function findMatchIds(query) {
+        // Names starting with the query come first, straight from the trie
+        var trieNode = searchTrie;
+        for (var c = 0; c < query.length && trieNode; c++) {
+            trieNode = trieNode.children[query[c]];
+        }
+        var prefixIds = trieNode ? trieNode.ids : [];
+        
+        // Then names containing it elsewhere; candidates are the previous matches when narrowing,
+        // otherwise the postings of the rarest query trigram
+        var candidates = null;
+        var narrowing = lastQuery !== '' && query.startsWith(lastQuery);
+        if (narrowing) {
+            candidates = lastMatchIds;
+        } else if (query.length >= 3) {
+            for (var c = 0; c + 3 <= query.length; c++) {
+                var posting = trigramIndex[query.substr(c, 3)];
+                if (!posting) {
+                    candidates = [];
+                    break;
+                }
+                if (candidates === null || posting.length < candidates.length) {
+                    candidates = posting;
+                }
+            }
+        }
+        var containsIds = [];
+        if (candidates === null) {
+            // Queries shorter than a trigram are cheap to check directly
+            for (var i = 0; i < lowerNames.length; i++) {
+                if (lowerNames[i].indexOf(query) > 0) containsIds.push(i);
+            }
+        } else {
+            for (var i = 0; i < candidates.length; i++) {
+                if (lowerNames[candidates[i]].indexOf(query) > 0) containsIds.push(candidates[i]);
+            }
+            if (narrowing) {
+                // Previous matches mixed both groups, restore alphabetical order
+                containsIds.sort(function(a, b) { return a - b; });
+            }
+        }
+        
+        lastQuery = query;
+        lastMatchIds = prefixIds.concat(containsIds);
+        return lastMatchIds;
+    }
+    
+    // Keystrokes are coalesced: only the latest query is searched, once per animation frame
+    var searchFrame = null;
     searchInput.addEventListener('input', function(e) {
         var query = e.target.value.toLowerCase().trim();
-        
+        if (searchFrame !== null) {
+            cancelAnimationFrame(searchFrame);
+        }
+        searchFrame = requestAnimationFrame(function() {
+            searchFrame = null;
+            renderSearch(query);
+        });
+    });
+    
+    function renderSearch(query) {
         if (query === '') {
+            lastQuery = '';
             searchResults.style.display = 'none';
             searchStatus.textContent = '';
             return;
         }
         
-        // Filter friends
-        var matches = friendList.filter(function(friend) {
-            return friend.name.toLowerCase().includes(query);
-        });
-        
-        // Sort by relevance (starts with query first, then contains)
-        matches.sort(function(a, b) {
-            var aStarts = a.name.toLowerCase().startsWith(query);
-            var bStarts = b.name.toLowerCase().startsWith(query);
-            if (aStarts && !bStarts) return -1;
-            if (!aStarts && bStarts) return 1;
-            return a.name.localeCompare(b.name);
-        });
+        // Matches come back ranked (starts with query first, then contains, each alphabetical)
+        var matchIds = findMatchIds(query);
         
         // Limit results
-        var maxResults = 20;
-        var limited = matches.slice(0, maxResults);
+        var limited = [];
+        for (var i = 0; i < matchIds.length && i < MAX_SEARCH_RESULTS; i++) {
+            limited.push(friendList[matchIds[i]]);
+        }
         
         // Display results
-        searchResults.innerHTML = '';
         searchResults.style.display = 'block';
         
         if (limited.length === 0) {
             searchResults.innerHTML = '<div class="search-result-item">No friends found</div>';
             searchStatus.textContent = '';
         } else {
-            limited.forEach(function(friend) {
+            // Build the list off-DOM and mount it in one go; clicks are handled by the delegated listener below
+            var frag = document.createDocumentFragment();
+            for (var i = 0; i < limited.length; i++) {
                 var item = document.createElement('div');
                 item.className = 'search-result-item';
-                item.textContent = friend.name;
-                item.onclick = function() {
-                    selectNodeByIndex(friend.index);
-                    searchInput.value = '';
-                    searchResults.style.display = 'none';
-                    searchStatus.textContent = '';
-                };
-                searchResults.appendChild(item);
-            });
+                item.textContent = limited[i].name;
+                item.dataset.idx = limited[i].index;
+                frag.appendChild(item);
+            }
+            searchResults.replaceChildren(frag);
             
-            if (matches.length > maxResults) {
-                searchStatus.textContent = 'Showing ' + limited.length + ' of ' + matches.length + ' matches';
+            if (matchIds.length > MAX_SEARCH_RESULTS) {
+                searchStatus.textContent = 'Showing ' + limited.length + ' of ' + matchIds.length + ' matches';
             } else {
-                searchStatus.textContent = matches.length + ' friend' + (matches.length !== 1 ? 's' : '') + ' found';
+                searchStatus.textContent = matchIds.length + ' friend' + (matchIds.length !== 1 ? 's' : '') + ' found';
             }
         }
+    }
+    
+    // One click handler for all result items
+    searchResults.addEventListener('click', function(e) {
+        var idx = e.target.dataset ? e.target.dataset.idx : undefined;
+        if (idx === undefined) return;
+        selectNodeByIndex(+idx);
+        searchInput.value = '';
+        searchResults.style.display = 'none';
+        searchStatus.textContent = '';
     });
     
-    // Close search results when clicking outside
+    // Close search results when clicking outside; only writes the style when they are showing
     document.addEventListener('click', function(e) {
-        if (!document.getElementById('search-container').contains(e.target)) {
+        if (searchResults.style.display !== 'none' && !e.target.closest('#search-container')) {
             searchResults.style.display = 'none';
         }
-    });
+    }, {passive: true});
     
     } // End initVisualization
     
@@ -2351,11 +2675,19 @@ document.addEventListener('DOMContentLoaded', function() {{
 </script>
 """
         
-        # Insert custom JS before closing body tag
-        html_content = html_content.replace('</body>', custom_js + '</body>')
+        # Write the custom JS just before the closing body tag, in pieces rather than
+        # building another full copy of the page
+        html_pre, body_close, html_post = html_content.rpartition('</body>')
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        pieces = (html_pre, custom_js, body_close, html_post)
+        if hasattr(output_file, 'write'):
+            for piece in pieces:
+                output_file.write(piece.encode('utf-8'))
+            output_file = getattr(output_file, 'name', output_file)
+        else:
+            with open(output_file, 'wb', buffering=HTML_WRITE_BUFFER) as f:
+                for piece in pieces:
+                    f.write(piece.encode('utf-8'))
         
         print(f"Visualization saved to: {output_file}")
         
@@ -2365,12 +2697,16 @@ document.addEventListener('DOMContentLoaded', function() {{
             print(f"\nNetwork Analysis:")
             print(f"  - Detected {num_communities_detected} friend communities/groups")
             
-            # Find most connected friends
-            node_degrees = [(node, self.graph.degree(node)) for node in self.graph.nodes()]
-            top_connected = sorted(node_degrees, key=lambda x: x[1], reverse=True)[:5]
+            # Find most connected friends (degrees straight from the CSR row lengths)
+            degrees = np.diff(indptr)
+            top_k = min(5, len(degrees))
+            top_idx = np.argpartition(-degrees, top_k - 1)[:top_k]
+            top_connected = sorted(top_idx, key=lambda i: (-degrees[i], i))
             
             print(f"\n  Most connected friends (mutual friend hubs):")
-            for user_id, connections in top_connected:
+            for i in top_connected:
+                user_id = all_nodes[i]
+                connections = int(degrees[i])
                 name = self.graph.nodes[user_id].get('name', user_id)
                 cross = node_cross_connectivity.get(user_id, 0)
                 print(f"    - {name}: {connections} mutual connections ({cross:.0%} cross-community)")
@@ -2426,13 +2762,12 @@ def main():
     edges = {}
     
     if args.source == 'vrcx_json':
-        print("\nLoading data from vrcx_mutual_friends.json...")
+        print("\nLoading data from vrcx_mutual_friends.json.gz...")
         try:
-            with open('vrcx_mutual_friends.json', 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = load_friend_cache(find_friend_cache(os.getcwd()) or FRIEND_CACHE_FILE)
             
             # Convert friends
-            for user_id, name in data['friends'].items():
+            for user_id, name in iter_cache_friends(data['friends']):
                 friends[user_id] = {
                     'id': user_id,
                     'name': name,
@@ -2441,14 +2776,13 @@ def main():
                 }
             
             # Convert edges
-            for edge_key, count in data['edges'].items():
-                user1, user2 = edge_key.split('|')
+            for user1, user2, count in iter_cache_edges(data['edges']):
                 edges[(user1, user2)] = count
             
             print(f"Loaded {len(friends)} friends and {len(edges)} connections")
             
         except FileNotFoundError:
-            print("vrcx_mutual_friends.json not found!")
+            print("vrcx_mutual_friends.json.gz not found!")
             print("   Run: python analyze_vrcx_mutuals.py first")
             return
         except Exception as e:
@@ -6,11 +6,83 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext, filedialog
 import os
 import sys
-import json
 import webbrowser
 import threading
 import time
 import traceback
+import queue
+import heapq
+from operator import itemgetter
+from pathlib import Path
+
+# Worker threads never touch Tk directly: queued calls, the latest status/statistics and log
+# lines are all applied by one periodic drain on the Tk thread. Interval between drains and
+# the most log lines appended per drain
+UI_DRAIN_INTERVAL_MS = 50
+LOG_PUMP_MAX_LINES = 200
+
+BYTES_TO_MB = 1 / (1024 * 1024)
+
+# Fetch progress (reported once per friend) is passed on to the status line at most this often
+FETCH_PROGRESS_MIN_INTERVAL = 0.1
+
+# Names longer than this are cut to fit the Top Connected Friends panel
+TOP_FRIEND_NAME_MAX = 18
+
+# GUI colour themes: ttk style options (configure/map) plus the plain Tk widgets.
+# Options missing from a theme keep whatever was last applied.
+_DARK_BG, _DARK_FG = '#2d2d30', '#e8e8e8'      # Softer dark gray, softer white
+_LIGHT_BG, _LIGHT_FG = '#f0f0f0', '#000000'
+GUI_THEMES = {
+    'dark': {
+        'root_bg': _DARK_BG,
+        'configure': {
+            'TFrame': {'background': _DARK_BG},
+            'TLabel': {'background': _DARK_BG, 'foreground': _DARK_FG},
+            'TLabelframe': {'background': _DARK_BG, 'foreground': _DARK_FG, 'bordercolor': '#555'},
+            'TLabelframe.Label': {'background': _DARK_BG, 'foreground': _DARK_FG},
+            'TButton': {'background': '#505050', 'foreground': _DARK_FG, 'bordercolor': '#555'},
+            'TCheckbutton': {'background': _DARK_BG, 'foreground': _DARK_FG, 'borderwidth': 0, 'relief': 'flat'},
+            'TEntry': {'fieldbackground': '#3c3c3c', 'foreground': _DARK_FG, 'bordercolor': '#555'},
+            'TSpinbox': {'fieldbackground': '#3c3c3c', 'foreground': _DARK_FG, 'bordercolor': '#555', 'arrowcolor': _DARK_FG},
+            'TProgressbar': {'background': '#4CAF50', 'troughcolor': '#3e3e42', 'bordercolor': '#555',
+                             'lightcolor': '#4CAF50', 'darkcolor': '#4CAF50'},
+        },
+        'map': {
+            'TButton': {'background': [('active', '#606060')]},
+            'TCheckbutton': {'background': [('active', '#3e3e42'), ('selected', _DARK_BG)],
+                             'foreground': [('active', _DARK_FG), ('selected', _DARK_FG)],
+                             'indicatorcolor': [('selected', '#4CAF50'), ('!selected', '#555')]},
+        },
+        'log_text': {'bg': '#1e1e1e', 'fg': '#d4d4d4', 'insertbackground': _DARK_FG,
+                     'selectbackground': '#007acc', 'selectforeground': '#ffffff'},
+        'top_friends_text': {'bg': _DARK_BG, 'fg': _DARK_FG},
+    },
+    'light': {
+        'root_bg': _LIGHT_BG,
+        'configure': {
+            'TFrame': {'background': _LIGHT_BG},
+            'TLabel': {'background': _LIGHT_BG, 'foreground': _LIGHT_FG},
+            'TLabelframe': {'background': _LIGHT_BG, 'foreground': _LIGHT_FG},
+            'TLabelframe.Label': {'background': _LIGHT_BG, 'foreground': _LIGHT_FG},
+            'TButton': {'background': '#e0e0e0', 'foreground': _LIGHT_FG},
+            'TCheckbutton': {'background': _LIGHT_BG, 'foreground': _LIGHT_FG, 'borderwidth': 0, 'relief': 'flat'},
+            'TEntry': {'fieldbackground': '#ffffff', 'foreground': _LIGHT_FG},
+            'TSpinbox': {'fieldbackground': '#ffffff', 'foreground': _LIGHT_FG, 'arrowcolor': _LIGHT_FG},
+            'TProgressbar': {'background': '#4CAF50', 'troughcolor': '#e0e0e0', 'bordercolor': '#ccc',
+                             'lightcolor': '#4CAF50', 'darkcolor': '#4CAF50'},
+        },
+        'map': {
+            'TButton': {'background': [('active', '#d0d0d0')]},
+            'TCheckbutton': {'background': [('active', '#e0e0e0'), ('selected', _LIGHT_BG)],
+                             'foreground': [('active', _LIGHT_FG), ('selected', _LIGHT_FG)],
+                             'indicatorcolor': [('selected', '#4CAF50'), ('!selected', '#aaa')]},
+        },
+        'log_text': {'bg': '#ffffff', 'fg': '#000000', 'insertbackground': _LIGHT_FG,
+                     'selectbackground': '#0078d7', 'selectforeground': '#ffffff'},
+        'top_friends_text': {'bg': _LIGHT_BG, 'fg': _LIGHT_FG},
+    },
+}
 
 # Add PyInstaller temp directory to path if running as exe
 if getattr(sys, 'frozen', False):
@@ -24,9 +96,18 @@ else:
 if bundle_dir not in sys.path:
     sys.path.insert(0, bundle_dir)
 
-# Import the visualizer and VRCX extractor
-from vrchat_friend_network_visualizer import FriendNetworkVisualizer
-from extract_vrcx_mutuals import extract_friends_and_mutuals
+# The VRCX extractor only needs the standard library, so it is imported once here. The
+# visualizer (networkx/numpy/plotly) and the API fetcher (requests) stay imported where they
+# are used, so the window can appear before those modules load
+from extract_vrcx_mutuals import (get_vrcx_users, extract_friends_and_mutuals, find_friend_cache,
+                                  load_friend_cache, save_friend_cache, iter_cache_friends, iter_cache_edges)
+
+
+def short_display_name(name):
+    """Cut a display name to TOP_FRIEND_NAME_MAX characters, ending in '...' when shortened"""
+    if len(name) > TOP_FRIEND_NAME_MAX:
+        return name[:TOP_FRIEND_NAME_MAX - 3] + '...'
+    return name
 
 
 class VRChatNetworkGUI:
@@ -44,6 +125,7 @@ class VRChatNetworkGUI:
         self.dark_mode_gui = True
         self.exe_dir = self.get_exe_dir()
         self.vrcx_users = []  # List of available VRCX users
+        self._display_to_hash = {}  # Dropdown label -> user hash for vrcx_users
         self.selected_user_hash = None  # Currently selected user hash
         
         # Statistics tracking
@@ -51,12 +133,26 @@ class VRChatNetworkGUI:
         self.total_mutuals = 0
         self.total_connections = 0
         
-        # Configure style
+        # Calls posted from worker threads and log lines from any thread, both applied by _drain_ui
+        self._ui_queue = queue.SimpleQueue()
+        self._log_queue = queue.SimpleQueue()
+        self._ts_cached = (0, '')  # (epoch second, "%H:%M:%S") of the last log line
+        
+        # Pending status/statistics values; only the latest of each is drawn on the next drain
+        self._pending_ui = {}
+        self._ui_lock = threading.Lock()
+        self._shown_status = (None, None)  # (message, step) currently displayed
+        self._shown_progress = None  # Whole percent currently displayed
+        self._last_fetch_progress_ts = 0.0  # time.monotonic() of the last fetch progress update
+        
+        # Configure style; _style_state remembers the options already sent to ttk
         self.style = ttk.Style()
         self.style.theme_use('clam')
+        self._style_state = {}
         
         self.create_widgets()
         self.apply_theme()
+        self.root.after(UI_DRAIN_INTERVAL_MS, self._drain_ui)
     
     def get_exe_dir(self):
         """Get the data directory for storing generated files"""
@@ -177,9 +273,24 @@ class VRChatNetworkGUI:
         self.use_cached_var = tk.BooleanVar(value=False)
         ttk.Checkbutton(options_section, text="Use Cached Data (Skip API)", variable=self.use_cached_var).pack(anchor='w', pady=2)
         
+        self.force_refresh_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_section, text="Force Refresh (Ignore API Cache)", variable=self.force_refresh_var).pack(anchor='w', pady=2)
+        
         self.auto_open_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(options_section, text="Auto-open in browser", variable=self.auto_open_var).pack(anchor='w', pady=2)
         
+        workers_frame = ttk.Frame(options_section)
+        workers_frame.pack(anchor='w', pady=2)
+        ttk.Label(workers_frame, text="Parallel API requests:").pack(side='left')
+        self.max_workers_var = tk.IntVar(value=4)
+        ttk.Spinbox(workers_frame, from_=1, to=8, width=4, textvariable=self.max_workers_var, state='readonly').pack(side='left', padx=(5, 0))
+        
+        cache_frame = ttk.Frame(options_section)
+        cache_frame.pack(anchor='w', pady=2)
+        ttk.Label(cache_frame, text="API cache lifetime (hours):").pack(side='left')
+        self.cache_hours_var = tk.IntVar(value=24)
+        ttk.Spinbox(cache_frame, values=(1, 6, 12, 24, 48, 72, 168), width=4, textvariable=self.cache_hours_var, state='readonly').pack(side='left', padx=(5, 0))
+        
         # Right column - Log and Progress
         right_frame = ttk.Frame(content_frame)
         right_frame.pack(side='right', fill='both', expand=True)
@@ -310,15 +421,17 @@ class VRChatNetworkGUI:
         appdata = os.getenv('APPDATA')
         db_path = os.path.join(appdata, 'VRCX', 'VRCX.sqlite3')
         
-        if os.path.exists(db_path):
-            self.db_path_var.set(db_path)
-            size_mb = os.path.getsize(db_path) / 1024 / 1024
-            self.log(f"[Database] Found VRCX database ({size_mb:.2f} MB)")
-            self.log(f"[Database] Location: {db_path}")
-            self.load_vrcx_users()
-        else:
+        try:
+            size_mb = os.stat(db_path).st_size * BYTES_TO_MB
+        except FileNotFoundError:
             self.log(f"[Database] Not found at default location")
             self.log(f"[Database] Please use Browse to select manually")
+            return
+        
+        self.db_path_var.set(db_path)
+        self.log(f"[Database] Found VRCX database ({size_mb:.2f} MB)")
+        self.log(f"[Database] Location: {db_path}")
+        self.load_vrcx_users()
 
     def browse_vrcx(self):
         """Browse for VRCX database file"""
@@ -328,16 +441,15 @@ class VRChatNetworkGUI:
         )
         if filename:
             self.db_path_var.set(filename)
-            size_mb = os.path.getsize(filename) / 1024 / 1024
+            size_mb = os.stat(filename).st_size * BYTES_TO_MB
             self.log(f"[Database] Selected: {filename} ({size_mb:.2f} MB)")
             self.load_vrcx_users()
 
     def load_vrcx_users(self):
         """Load available VRCX users from database"""
-        from extract_vrcx_mutuals import get_vrcx_users
-        
         try:
             self.vrcx_users = get_vrcx_users()
+            self._display_to_hash = {user['display']: user['user_hash'] for user in self.vrcx_users}
             
             if not self.vrcx_users:
                 self.user_select_var.set("No VRCX users found")
@@ -359,24 +471,56 @@ class VRChatNetworkGUI:
                     self.log(f"[Database]   - {user['display']}")
         except Exception as e:
             self.log(f"[Database] Error loading VRCX users: {e}")
-            import traceback
             traceback.print_exc()
     
     def on_user_selected(self, event=None):
         """Handle user selection from dropdown"""
         selected_display = self.user_select_var.get()
-        for user in self.vrcx_users:
-            if user['display'] == selected_display:
-                self.selected_user_hash = user['user_hash']
-                self.log(f"[Database] Selected account: {user['display']}")
-                break
+        user_hash = self._display_to_hash.get(selected_display)
+        if user_hash is not None:
+            self.selected_user_hash = user_hash
+            self.log(f"[Database] Selected account: {selected_display}")
+    
+    def _on_ui_thread(self, func, *args):
+        """Run func on the Tk thread; calls from worker threads are queued for the next drain"""
+        if threading.current_thread() is threading.main_thread():
+            func(*args)
+        else:
+            self._ui_queue.put((func, args))
     
     def log(self, message):
-        """Add message to log"""
-        timestamp = time.strftime("%H:%M:%S")
-        self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        """Add message to log (safe from any thread)"""
+        # Lines logged within the same second reuse the formatted timestamp
+        now = int(time.time())
+        cached = self._ts_cached
+        if now != cached[0]:
+            cached = self._ts_cached = (now, time.strftime("%H:%M:%S", time.localtime(now)))
+        self._log_queue.put(f"[{cached[1]}] {message}\n")
+    
+    def _drain_ui(self):
+        """Run queued calls, draw pending status/statistics and append queued log lines"""
+        # Rescheduled first, so an exception in a queued call can't stop the drain
+        self.root.after(UI_DRAIN_INTERVAL_MS, self._drain_ui)
+        
+        try:
+            while True:
+                func, args = self._ui_queue.get_nowait()
+                func(*args)
+        except queue.Empty:
+            pass
+        
+        self._flush_ui()
+        
+        # Up to LOG_PUMP_MAX_LINES log lines go in as a single insert
+        lines = []
+        try:
+            while len(lines) < LOG_PUMP_MAX_LINES:
+                lines.append(self._log_queue.get_nowait())
+        except queue.Empty:
+            pass
+        if lines:
+            self.log_text.insert(tk.END, "".join(lines))
+            self.log_text.see(tk.END)
 
     def clear_log(self):
         """Clear the log"""
@@ -391,7 +535,9 @@ class VRChatNetworkGUI:
             "Clear User Data",
             "This will delete:\n\n"
             "- Saved VRChat login session\n"
-            "- Cached friend list (vrcx_mutual_friends.json)\n"
+            "- Cached friend list (vrcx_mutual_friends.msgpack / .json.gz)\n"
+            "- Cached API responses (mutuals_cache.sqlite)\n"
+            "- Cached community detection (louvain_partition.pkl)\n"
             "- Generated network visualization\n\n"
             "Do this before sharing the application to remove personal data.\n\n"
             "Continue?",
@@ -402,29 +548,40 @@ class VRChatNetworkGUI:
             return
         
         files_removed = []
-        files_not_found = []
         
-        # List of files to remove
-        files_to_remove = [
+        # Files to remove
+        files_to_remove = (
             'vrchat_session.pkl',
+            'vrcx_mutual_friends.msgpack',
+            'vrcx_mutual_friends.json.gz',
             'vrcx_mutual_friends.json',
+            'mutuals_cache.sqlite',
+            'louvain_partition.pkl',
             'vrchat_friend_network.html'
-        ]
-        
-        # Remove each file if it exists
-        for filename in files_to_remove:
-            filepath = os.path.join(self.exe_dir, filename)
-            if os.path.exists(filepath):
-                try:
-                    os.remove(filepath)
-                    files_removed.append(filename)
-                    self.log(f"[Clear] Removed: {filename}")
-                except Exception as e:
-                    self.log(f"[Clear] Failed to remove {filename}: {e}")
-            else:
-                files_not_found.append(filename)
+        )
+        
+        # Remove matching files in a single pass over the data folder
+        files_seen = set()
+        try:
+            with os.scandir(self.exe_dir) as entries:
+                for entry in entries:
+                    if entry.name not in files_to_remove:
+                        continue
+                    files_seen.add(entry.name)
+                    try:
+                        os.unlink(entry.path)
+                        files_removed.append(entry.name)
+                        self.log(f"[Clear] Removed: {entry.name}")
+                    except OSError as e:
+                        self.log(f"[Clear] Failed to remove {entry.name}: {e}")
+        except FileNotFoundError:
+            pass
+        files_not_found = [f for f in files_to_remove if f not in files_seen]
         
         # Reset GUI state
+        if self.fetcher is not None:
+            self.fetcher.close()
+            self.fetcher = None
         self.output_path = None
         self.open_btn.config(state='disabled')
         self.login_status_var.set("Not logged in - Enter credentials and click Generate")
@@ -435,9 +592,11 @@ class VRChatNetworkGUI:
         
         # Remove the VFNV Data folder if it's empty or only has removed files
         try:
-            if os.path.exists(self.exe_dir) and os.path.isdir(self.exe_dir):
+            if os.path.isdir(self.exe_dir):
                 # Check if folder is empty
-                if not os.listdir(self.exe_dir):
+                with os.scandir(self.exe_dir) as entries:
+                    is_empty = not any(entries)
+                if is_empty:
                     os.rmdir(self.exe_dir)
                     self.log("[Clear] Removed VFNV Data folder")
         except Exception as e:
@@ -460,90 +619,66 @@ class VRChatNetworkGUI:
         self.log(f"[GUI] Theme changed to {'dark' if self.dark_mode_gui else 'light'} mode")
     
     def apply_theme(self):
-        """Apply the current theme to GUI elements"""
-        if self.dark_mode_gui:
-            # Dark theme colors - improved contrast
-            bg_color = '#2d2d30'  # Softer dark gray
-            fg_color = '#e8e8e8'  # Softer white
-            frame_bg = '#3e3e42'  # Lighter frame background
-            entry_bg = '#3c3c3c'  # Entry field background
-            log_bg = '#1e1e1e'  # Dark log background
-            log_fg = '#d4d4d4'  # Log text color
-            select_bg = '#007acc'  # Blue selection
-            select_fg = '#ffffff'  # White text on selection
-            
-            self.root.configure(bg=bg_color)
-            self.style.configure('TFrame', background=bg_color)
-            self.style.configure('TLabel', background=bg_color, foreground=fg_color)
-            self.style.configure('TLabelframe', background=bg_color, foreground=fg_color, bordercolor='#555')
-            self.style.configure('TLabelframe.Label', background=bg_color, foreground=fg_color)
-            self.style.configure('TButton', background='#505050', foreground=fg_color, bordercolor='#555')
-            self.style.configure('TCheckbutton', background=bg_color, foreground=fg_color, borderwidth=0, relief='flat')
-            self.style.configure('TEntry', fieldbackground=entry_bg, foreground=fg_color, bordercolor='#555')
-            self.style.configure('TProgressbar', background='#4CAF50', troughcolor='#3e3e42', bordercolor='#555', lightcolor='#4CAF50', darkcolor='#4CAF50')
-            self.style.map('TButton', background=[('active', '#606060')])
-            self.style.map('TCheckbutton', 
-                          background=[('active', '#3e3e42'), ('selected', bg_color)],
-                          foreground=[('active', fg_color), ('selected', fg_color)],
-                          indicatorcolor=[('selected', '#4CAF50'), ('!selected', '#555')])
-            
-            self.log_text.configure(
-                bg=log_bg, 
-                fg=log_fg, 
-                insertbackground=fg_color,
-                selectbackground=select_bg,
-                selectforeground=select_fg
-            )
-            self.top_friends_text.configure(
-                bg=bg_color,
-                fg=fg_color
-            )
-        else:
-            # Light theme colors
-            bg_color = '#f0f0f0'
-            fg_color = '#000000'
-            log_bg = '#ffffff'
-            log_fg = '#000000'
-            select_bg = '#0078d7'  # Blue selection
-            select_fg = '#ffffff'  # White text on selection
-            
-            self.root.configure(bg=bg_color)
-            self.style.configure('TFrame', background=bg_color)
-            self.style.configure('TLabel', background=bg_color, foreground=fg_color)
-            self.style.configure('TLabelframe', background=bg_color, foreground=fg_color)
-            self.style.configure('TLabelframe.Label', background=bg_color, foreground=fg_color)
-            self.style.configure('TButton', background='#e0e0e0', foreground=fg_color)
-            self.style.configure('TCheckbutton', background=bg_color, foreground=fg_color, borderwidth=0, relief='flat')
-            self.style.configure('TEntry', fieldbackground='#ffffff', foreground=fg_color)
-            self.style.configure('TProgressbar', background='#4CAF50', troughcolor='#e0e0e0', bordercolor='#ccc', lightcolor='#4CAF50', darkcolor='#4CAF50')
-            self.style.map('TButton', background=[('active', '#d0d0d0')])
-            self.style.map('TCheckbutton', 
-                          background=[('active', '#e0e0e0'), ('selected', bg_color)],
-                          foreground=[('active', fg_color), ('selected', fg_color)],
-                          indicatorcolor=[('selected', '#4CAF50'), ('!selected', '#aaa')])
-            
-            self.log_text.configure(
-                bg=log_bg, 
-                fg=log_fg, 
-                insertbackground=fg_color,
-                selectbackground=select_bg,
-                selectforeground=select_fg
-            )
-            self.top_friends_text.configure(
-                bg=bg_color,
-                fg=fg_color
-            )
+        """Apply the current theme to GUI elements, sending only style options that change"""
+        theme = GUI_THEMES['dark' if self.dark_mode_gui else 'light']
+        
+        self.root.configure(bg=theme['root_bg'])
+        for kind, apply_style in (('configure', self.style.configure), ('map', self.style.map)):
+            for style_name, options in theme[kind].items():
+                current = self._style_state.setdefault((kind, style_name), {})
+                changed = {key: value for key, value in options.items() if current.get(key) != value}
+                if changed:
+                    apply_style(style_name, **changed)
+                    current.update(changed)
+        
+        self.log_text.configure(**theme['log_text'])
+        self.top_friends_text.configure(**theme['top_friends_text'])
 
+    def _flush_ui(self):
+        """Apply the latest pending status and statistics in one pass (Tk thread)"""
+        with self._ui_lock:
+            pending = self._pending_ui
+            if not pending:
+                return
+            self._pending_ui = {}
+        if 'status' in pending:
+            self._apply_status(*pending['status'])
+        if 'statistics' in pending:
+            self._apply_statistics(**pending['statistics'])
+    
     def update_status(self, message, step="", progress=0):
-        """Update status and step indicators"""
-        self.status_var.set(message)
-        self.step_var.set(step)
-        self.progress['value'] = progress
-        self.progress_pct_var.set(f"{progress}%")
-        self.root.update_idletasks()
+        """Update status and step indicators (safe from any thread, drawn on the next drain)"""
+        with self._ui_lock:
+            self._pending_ui['status'] = (message, step, progress)
+    
+    def _apply_status(self, message, step, progress):
+        """Write status values to the widgets (Tk thread only), skipping values already shown"""
+        if (message, step) != self._shown_status:
+            if message != self._shown_status[0]:
+                self.status_var.set(message)
+            if step != self._shown_status[1]:
+                self.step_var.set(step)
+            self._shown_status = (message, step)
+        self._set_progress(progress)
+    
+    def _set_progress(self, progress):
+        """Show progress as a whole percent; unchanged values don't touch the Progressbar (Tk thread only)"""
+        progress = int(progress)
+        if progress != self._shown_progress:
+            self._shown_progress = progress
+            self.progress.configure(value=progress)
+            self.progress_pct_var.set(f"{progress}%")
     
     def update_statistics(self, friends=None, edges=None, communities=None, isolated=None, density=None, top_friends=None):
-        """Update statistics display"""
+        """Update statistics display (safe from any thread, drawn on the next drain)"""
+        values = {'friends': friends, 'edges': edges, 'communities': communities,
+                  'isolated': isolated, 'density': density, 'top_friends': top_friends}
+        with self._ui_lock:
+            statistics = self._pending_ui.setdefault('statistics', {})
+            statistics.update((key, value) for key, value in values.items() if value is not None)
+    
+    def _apply_statistics(self, friends=None, edges=None, communities=None, isolated=None, density=None, top_friends=None):
+        """Write statistics to the widgets (Tk thread only)"""
         if friends is not None:
             self.total_friends = friends
             self.friends_count_var.set(str(friends))
@@ -561,17 +696,21 @@ class VRChatNetworkGUI:
             self.top_friends_text.delete('1.0', tk.END)
             self.top_friends_text.insert('1.0', top_friends)
             self.top_friends_text.config(state='disabled')
-        self.root.update_idletasks()
     
     def fetch_progress_callback(self, current, total):
-        """Callback for fetch progress updates"""
+        """Callback for fetch progress updates (rate-limited; the final update always goes through)"""
+        now = time.monotonic()
+        if current < total and now - self._last_fetch_progress_ts < FETCH_PROGRESS_MIN_INTERVAL:
+            return
+        self._last_fetch_progress_ts = now
+        
         # Progress from 30% to 55% during fetch (25% range for step 2)
-        progress = 30 + int((current / total) * 25)
-        self.root.after(0, lambda: self.update_status(
+        progress = 30 + (current * 25) // total
+        self.update_status(
             f"Fetching mutual connections...",
             f"Step 2 of 4: Processing friend {current}/{total}",
             progress
-        ))
+        )
 
     def show_login_section(self):
         """Show the login section (already visible, just update status)"""
@@ -585,13 +724,13 @@ class VRChatNetworkGUI:
         twofa_code = self.twofa_entry.get().strip()
         
         if not username or not password:
-            self.login_status_var.set("Error: Username and password required")
+            self._on_ui_thread(self.login_status_var.set, "Error: Username and password required")
             self.log("[Login] Please enter username and password")
             return False
         
         try:
             self.log("[Login] Attempting to authenticate...")
-            self.login_status_var.set("Logging in...")
+            self._on_ui_thread(self.login_status_var.set, "Logging in...")
             
             # Pass 2FA code to login method if provided
             if twofa_code:
@@ -600,7 +739,7 @@ class VRChatNetworkGUI:
             else:
                 self.fetcher.login(username, password)
             
-            self.login_status_var.set("Login successful")
+            self._on_ui_thread(self.login_status_var.set, "Login successful")
             self.log("[Login] Authentication successful")
             return True
             
@@ -609,13 +748,13 @@ class VRChatNetworkGUI:
             
             if "2FA" in error_msg or "twoFactor" in error_msg:
                 if not twofa_code:
-                    self.login_status_var.set("Error: 2FA code required")
+                    self._on_ui_thread(self.login_status_var.set, "Error: 2FA code required")
                     self.log("[Login] Two-factor authentication required - please enter 2FA code above")
                 else:
-                    self.login_status_var.set("Error: Invalid 2FA code")
+                    self._on_ui_thread(self.login_status_var.set, "Error: Invalid 2FA code")
                     self.log(f"[Login] Invalid 2FA code - please check and try again")
             else:
-                self.login_status_var.set(f"Error: {error_msg}")
+                self._on_ui_thread(self.login_status_var.set, f"Error: {error_msg}")
                 self.log(f"[Login] Failed: {error_msg}")
             
             return False
@@ -627,11 +766,10 @@ class VRChatNetworkGUI:
 
         # Check if using cached data
         use_cached = self.use_cached_var.get()
-        json_file = os.path.join(self.exe_dir, 'vrcx_mutual_friends.json')
         
         if use_cached:
             # Check if cached JSON exists
-            if not os.path.exists(json_file):
+            if find_friend_cache(self.exe_dir) is None:
                 self.log("[Error] Cached data not found. Please generate data first without 'Use Cached Data' option.")
                 self.update_status("Error: No cached data")
                 return
@@ -657,8 +795,7 @@ class VRChatNetworkGUI:
         self.generate_btn.config(state='disabled')
         self.stop_btn.config(state='normal')
         self.open_btn.config(state='disabled')
-        self.progress['value'] = 0
-        self.progress_pct_var.set("0%")
+        self._set_progress(0)
         
         # Run in separate thread
         thread = threading.Thread(target=self.process_network, args=(db_path,))
@@ -670,7 +807,7 @@ class VRChatNetworkGUI:
         if self.processing:
             self.stop_requested = True
             self.log("[Process] Stop requested, waiting for current operation to finish...")
-            self.update_status("Stopping...", "Cancelling", self.progress['value'])
+            self.update_status("Stopping...", "Cancelling", self._shown_progress or 0)
             self.stop_btn.config(state='disabled')
 
     def process_network(self, db_path):
@@ -681,34 +818,29 @@ class VRChatNetworkGUI:
             
             # Check if using cached data
             use_cached = self.use_cached_var.get()
-            json_file = os.path.join(self.exe_dir, 'vrcx_mutual_friends.json')
+            json_file = find_friend_cache(self.exe_dir) if use_cached else None
             
-            if use_cached and os.path.exists(json_file):
+            if use_cached and json_file:
                 # Load from cached JSON
                 self.update_status("Loading cached data...", "Step 1 of 2", 10)
                 self.log("[Step 1/2] Loading friend data from cached JSON")
                 
-                import json
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    json_data = json.load(f)
+                json_data = load_friend_cache(json_file)
                 
                 # Build friends_data structure from JSON
                 friends_data = {}
-                for friend_id, friend_info in json_data.get('friends', {}).items():
+                for friend_id, name in iter_cache_friends(json_data.get('friends', {})):
                     friends_data[friend_id] = {
-                        'name': friend_info.get('name', friend_id),
+                        'name': name,
                         'id': friend_id,
                         'mutuals': []
                     }
                 
                 # Rebuild mutuals from edges
-                for edge_key in json_data.get('edges', {}).keys():
-                    parts = edge_key.split('|')
-                    if len(parts) == 2:
-                        friend1, friend2 = parts
-                        if friend1 in friends_data and friend2 in friends_data:
-                            friends_data[friend1]['mutuals'].append(friend2)
-                            friends_data[friend2]['mutuals'].append(friend1)
+                for friend1, friend2, _ in iter_cache_edges(json_data.get('edges', [])):
+                    if friend1 in friends_data and friend2 in friends_data:
+                        friends_data[friend1]['mutuals'].append(friend2)
+                        friends_data[friend2]['mutuals'].append(friend1)
                 
                 friend_count = len(friends_data)
                 self.log(f"[Step 1/2] Loaded {friend_count} friends from cache")
@@ -723,14 +855,7 @@ class VRChatNetworkGUI:
                 self.update_status("Extracting friend data...", "Step 1 of 4", 5)
                 self.log("[Step 1/4] Extracting friends from VRCX database")
                 
-                if self.stop_requested:
-                    self.log("[Process] Stopped by user")
-                    self.update_status("Stopped by user", "Cancelled", 0)
-                    # Reset state without calling processing_complete since we didn't complete
-                    self.processing = False
-                    self.stop_requested = False
-                    self.root.after(0, lambda: self.generate_btn.config(state='normal'))
-                    self.root.after(0, lambda: self.stop_btn.config(state='disabled'))
+                if self._check_stop():
                     return
                 
                 friends_data = extract_friends_and_mutuals(self.selected_user_hash)
@@ -743,14 +868,7 @@ class VRChatNetworkGUI:
                 self.update_statistics(friends=friend_count)
                 self.update_status("Friend data extracted", "Step 1 of 4 Complete", 20)
 
-                if self.stop_requested:
-                    self.log("[Process] Stopped by user")
-                    self.update_status("Stopped by user", "Cancelled", 0)
-                    # Reset state without calling processing_complete since we didn't complete
-                    self.processing = False
-                    self.stop_requested = False
-                    self.root.after(0, lambda: self.generate_btn.config(state='normal'))
-                    self.root.after(0, lambda: self.stop_btn.config(state='disabled'))
+                if self._check_stop():
                     return
 
                 # Step 2: Fetch mutual connections from API
@@ -758,8 +876,10 @@ class VRChatNetworkGUI:
                 self.log("[Step 2/4] Preparing to fetch mutual connections")
                 
                 from fetch_vrchat_mutuals import VRChatMutualFetcher
-                # Use exe directory to store session and cache files
-                self.fetcher = VRChatMutualFetcher(base_dir=self.exe_dir, stop_callback=lambda: self.stop_requested)
+                # Use exe directory to store session and cache files; the fetcher (and its open
+                # API connections) is kept for later runs until user data is cleared
+                if self.fetcher is None:
+                    self.fetcher = VRChatMutualFetcher(base_dir=self.exe_dir, stop_callback=lambda: self.stop_requested)
                 
                 api_mutuals = {}
                 
@@ -774,7 +894,7 @@ class VRChatNetworkGUI:
                     if not username or not password:
                         # No credentials, show login section and stop
                         self.log("[Step 2/4] Please enter login credentials above and click Generate again")
-                        self.root.after(0, self.show_login_section)
+                        self._on_ui_thread(self.show_login_section)
                         self.update_status("Login required", "Enter credentials and retry")
                         raise Exception("Login required")
                     
@@ -788,7 +908,10 @@ class VRChatNetworkGUI:
                         self.log(f"[Step 2/4] Fetching mutuals for {len(friend_ids)} friends")
                         self.log("[Step 2/4] This may take several minutes...")
                         
-                        api_mutuals = self.fetcher.fetch_all_mutuals(friend_ids, progress_callback=self.fetch_progress_callback)
+                        api_mutuals = self.fetcher.fetch_all_mutuals(friend_ids, progress_callback=self.fetch_progress_callback,
+                                                                     max_workers=self.max_workers_var.get(),
+                                                                     force_refresh=self.force_refresh_var.get(),
+                                                                     cache_ttl=self.cache_hours_var.get() * 3600)
                     else:
                         self.log("[Step 2/4] Login failed")
                         self.update_status("Login failed", "Check credentials")
@@ -796,13 +919,16 @@ class VRChatNetworkGUI:
                 else:
                     # Session restored, fetch mutuals
                     self.update_status("Fetching mutual connections...", "Step 2 of 4", 30)
-                    self.login_status_var.set("Using saved session")
+                    self._on_ui_thread(self.login_status_var.set, "Using saved session")
                     friend_ids = list(friends_data.keys())
                     self.log(f"[Step 2/4] Using saved session")
                     self.log(f"[Step 2/4] Fetching mutuals for {len(friend_ids)} friends")
                     self.log("[Step 2/4] This may take several minutes...")
                     
-                    api_mutuals = self.fetcher.fetch_all_mutuals(friend_ids, progress_callback=self.fetch_progress_callback)
+                    api_mutuals = self.fetcher.fetch_all_mutuals(friend_ids, progress_callback=self.fetch_progress_callback,
+                                                                 max_workers=self.max_workers_var.get(),
+                                                                 force_refresh=self.force_refresh_var.get(),
+                                                                 cache_ttl=self.cache_hours_var.get() * 3600)
                 
                 # Check if we have any mutual data
                 if not api_mutuals:
@@ -810,48 +936,41 @@ class VRChatNetworkGUI:
                     self.update_status("No mutual data", "Check login")
                     raise Exception("No mutual data retrieved")
                 
-                # Merge mutual data
+                # Merge mutual data, count it and collect edges in one pass over friends_data.
+                # Mutuals outside this friend list are dropped here, so the graph build needs no
+                # membership checks. Each connection is reported by both friends, so edges are
+                # deduplicated as (lower, higher) tuples
+                friend_id_set = frozenset(friends_data)
+                mutual_counts = {}
                 mutual_count = 0
-                for friend_id, mutuals_list in api_mutuals.items():
-                    if friend_id in friends_data:
-                        friends_data[friend_id]['mutuals'] = mutuals_list
-                        mutual_count += len(mutuals_list)
+                edge_set = set()
+                for friend_id, friend_info in friends_data.items():
+                    mutuals_list = api_mutuals.get(friend_id, ())
+                    mutuals = [m for m in mutuals_list if m in friend_id_set]
+                    friend_info['mutuals'] = mutuals
+                    mutual_counts[friend_id] = len(mutuals_list)
+                    mutual_count += len(mutuals_list)
+                    for mutual_id in mutuals:
+                        edge_set.add((friend_id, mutual_id) if friend_id < mutual_id else (mutual_id, friend_id))
                 
-                # Save JSON cache of friend data
-                import json
+                # Save JSON cache of friend data; friends are stored as {id: name} and edges as
+                # [a, b] pairs (the encoders write tuples as arrays directly)
                 json_output = {
-                    'friends': {uid: {'id': uid, 'name': data.get('name', uid)} for uid, data in friends_data.items()},
-                    'edges': {},
-                    'mutual_counts': {}
+                    'friends': {uid: data.get('name', uid) for uid, data in friends_data.items()},
+                    'edges': list(edge_set),
+                    'mutual_counts': mutual_counts
                 }
-                # Build edges from mutuals
-                for friend_id, friend_info in friends_data.items():
-                    mutuals = friend_info.get('mutuals', [])
-                    json_output['mutual_counts'][friend_id] = len(mutuals)
-                    for mutual_id in mutuals:
-                        if mutual_id in friends_data:
-                            edge_key = f"{min(friend_id, mutual_id)}|{max(friend_id, mutual_id)}"
-                            json_output['edges'][edge_key] = 1
                 
-                json_file = os.path.join(self.exe_dir, 'vrcx_mutual_friends.json')
-                with open(json_file, 'w', encoding='utf-8') as f:
-                    json.dump(json_output, f, indent=2, ensure_ascii=False)
+                json_file = save_friend_cache(self.exe_dir, json_output)
                 self.log(f"[Step 2/4] Saved friend cache to: {json_file}")
                 
                 self.log(f"[Step 2/4] Collected {mutual_count} mutual connection entries")
                 # Note: actual edges will be ~half this since each connection is counted twice
                 self.update_status("Mutual connections fetched", "Step 2 of 4 Complete", 55)
 
-                if self.stop_requested:
-                    self.log("[Process] Stopped by user")
-                    self.update_status("Stopped by user", "Cancelled", 0)
-                    # Reset state without calling processing_complete since we didn't complete
-                    self.processing = False
-                    self.stop_requested = False
-                    self.root.after(0, lambda: self.generate_btn.config(state='normal'))
-                    self.root.after(0, lambda: self.stop_btn.config(state='disabled'))
+                if self._check_stop():
                     return
-                self.root.after(0, lambda: self.stop_btn.config(state='disabled'))
+                self._on_ui_thread(self.stop_btn.config, {'state': 'disabled'})
                 return
 
             # Step 3/2: Build network graph (step numbering depends on cached mode)
@@ -861,30 +980,28 @@ class VRChatNetworkGUI:
             self.update_status("Building network graph...", f"Step {step_num}", progress_val)
             self.log(f"[Step {step_num}] Constructing network graph")
             
-            friends_dict = {}
-            for friend_id, friend_info in friends_data.items():
-                friends_dict[friend_id] = {
-                    'name': friend_info.get('name', friend_id),
-                    'id': friend_id
-                }
-            
-            visualizer = FriendNetworkVisualizer(friends_dict)
+            # friends_data entries already carry 'name' (the only field the visualizer reads),
+            # so they are passed through as node data rather than copied into a new dict
+            from vrchat_friend_network_visualizer import FriendNetworkVisualizer
+            visualizer = FriendNetworkVisualizer(friends_data, cache_dir=self.exe_dir)
             
-            edge_count = 0
-            for friend_id, friend_info in friends_data.items():
-                mutuals = friend_info.get('mutuals', [])
-                for mutual_id in mutuals:
-                    if mutual_id in friends_data:
-                        visualizer.graph.add_edge(friend_id, mutual_id)
-                        edge_count += 1
+            # One add_edges_from call; connections reported by both friends collapse into one edge.
+            # Both load paths keep only mutuals that are in friends_data, so no check is needed here
+            visualizer.graph.add_edges_from(
+                (friend_id, mutual_id)
+                for friend_id, friend_info in friends_data.items()
+                for mutual_id in friend_info['mutuals']
+            )
+            edge_count = visualizer.graph.number_of_edges()
             
             use_cached = self.use_cached_var.get()
             step_num = "2 of 2" if use_cached else "3 of 4"
-            self.log(f"[Step {step_num}] Built graph with {len(friends_dict)} nodes and {edge_count} edges")
+            self.log(f"[Step {step_num}] Built graph with {len(friends_data)} nodes and {edge_count} edges")
             
             # Calculate statistics
-            isolated_count = sum(1 for node in visualizer.graph.nodes() if visualizer.graph.degree(node) == 0)
-            connected_nodes = len(friends_dict) - isolated_count
+            degrees = visualizer.graph.degree()
+            isolated_count = sum(1 for _, degree_count in degrees if degree_count == 0)
+            connected_nodes = len(friends_data) - isolated_count
             
             # Calculate density (only for connected component)
             if connected_nodes > 1:
@@ -895,17 +1012,14 @@ class VRChatNetworkGUI:
             
             # Find top 5 connected friends
             if visualizer.graph.number_of_nodes() > 0:
-                degrees = dict(visualizer.graph.degree())
                 # Get top 5, sorted by degree
-                top_nodes = sorted(degrees.items(), key=lambda x: x[1], reverse=True)[:5]
-                top_friends_lines = []
-                for i, (node, degree_count) in enumerate(top_nodes, 1):
-                    name = friends_dict.get(node, {}).get('name', 'Unknown')
-                    # Truncate long names
-                    if len(name) > 18:
-                        name = name[:15] + '...'
-                    top_friends_lines.append(f"{i}. {name} ({degree_count})")
-                top_friends_text = "\n".join(top_friends_lines)
+                top_nodes = heapq.nlargest(5, degrees, key=itemgetter(1))
+                # Every graph node comes from friends_data, so names are read directly;
+                # only these five are shortened
+                top_friends_text = "\n".join(
+                    f"{i}. {short_display_name(friends_data[node]['name'])} ({degree_count})"
+                    for i, (node, degree_count) in enumerate(top_nodes, 1)
+                )
             else:
                 top_friends_text = "-"
             
@@ -915,14 +1029,7 @@ class VRChatNetworkGUI:
             progress_val = 80 if use_cached else 75
             self.update_status("Network graph built", step_complete, progress_val)
 
-            if self.stop_requested:
-                self.log("[Process] Stopped by user")
-                self.update_status("Stopped by user", "Cancelled", 0)
-                # Reset state without calling processing_complete since we didn't complete
-                self.processing = False
-                self.stop_requested = False
-                self.root.after(0, lambda: self.generate_btn.config(state='normal'))
-                self.root.after(0, lambda: self.stop_btn.config(state='disabled'))
+            if self._check_stop():
                 return
 
             # Step 4/2: Generate visualization (final step in both modes)
@@ -940,19 +1047,12 @@ class VRChatNetworkGUI:
             
             visualizer.create_visualization(output_file, dark_mode, show_heatmap, show_edges)
             
-            # Get community count from visualizer after generation
-            try:
-                import community as community_louvain
-                partition = community_louvain.best_partition(visualizer.graph.subgraph(
-                    [n for n in visualizer.graph.nodes() if visualizer.graph.degree(n) > 0]
-                ), resolution=1.5)
-                num_communities = len(set(partition.values()))
-                self.update_statistics(communities=num_communities)
-                use_cached = self.use_cached_var.get()
-                step_num = "2 of 2" if use_cached else "4 of 4"
-                self.log(f"[Step {step_num}] Detected {num_communities} communities")
-            except:
-                pass
+            # Community count from the partition the visualization was drawn with
+            num_communities = len(visualizer.communities)
+            self.update_statistics(communities=num_communities)
+            use_cached = self.use_cached_var.get()
+            step_num = "2 of 2" if use_cached else "4 of 4"
+            self.log(f"[Step {step_num}] Detected {num_communities} communities")
             
             self.output_path = output_file
             use_cached = self.use_cached_var.get()
@@ -964,23 +1064,39 @@ class VRChatNetworkGUI:
             # Open in browser if requested
             if self.auto_open_var.get():
                 self.log("[Complete] Opening in browser")
-                webbrowser.open('file://' + os.path.abspath(output_file))
+                webbrowser.open(Path(output_file).resolve().as_uri())
 
             self.log("[Complete] Network visualization generated successfully")
             self.update_status("Complete", "All steps finished", 100)
-            self.root.after(0, self.processing_complete)
+            self._on_ui_thread(self.processing_complete)
 
         except Exception as e:
             error_msg = str(e)
             self.log(f"[Error] {error_msg}")
-            self.root.after(0, lambda: self.processing_failed(error_msg))
+            self._on_ui_thread(self.processing_failed, error_msg)
 
-    def processing_complete(self):
-        """Called when processing completes successfully"""
+    def _check_stop(self):
+        """If a stop was requested, reset to idle and return True (called from the worker thread)"""
+        if not self.stop_requested:
+            return False
+        self.log("[Process] Stopped by user")
+        self.update_status("Stopped by user", "Cancelled", 0)
+        # Reset state without calling processing_complete since we didn't complete
         self.processing = False
         self.stop_requested = False
+        self._on_ui_thread(self._reset_buttons)
+        return True
+    
+    def _reset_buttons(self):
+        """Re-enable Generate and disable Stop (Tk thread only)"""
         self.generate_btn.config(state='normal')
         self.stop_btn.config(state='disabled')
+
+    def processing_complete(self):
+        """Called when processing completes successfully"""
+        self.processing = False
+        self.stop_requested = False
+        self._reset_buttons()
         self.open_btn.config(state='normal')
         self.update_status("Complete - Ready to generate again", "", 100)
 
@@ -988,10 +1104,8 @@ class VRChatNetworkGUI:
         """Called when processing fails"""
         self.processing = False
         self.stop_requested = False
-        self.generate_btn.config(state='normal')
-        self.stop_btn.config(state='disabled')
-        self.progress['value'] = 0
-        self.progress_pct_var.set("0%")
+        self._reset_buttons()
+        self._set_progress(0)
         self.update_status(f"Failed: {error_msg}", "", 0)
 
     def open_visualization(self):
@@ -1004,7 +1118,7 @@ class VRChatNetworkGUI:
             file_path = os.path.join(self.exe_dir, 'vrchat_friend_network.html')
         
         if os.path.exists(file_path):
-            webbrowser.open('file:///' + os.path.abspath(file_path).replace(chr(92), '/'))
+            webbrowser.open(Path(file_path).resolve().as_uri())
             self.log("[Action] Opened visualization in browser")
         else:
             self.log("[Error] No visualization file found")